@@ -1,11 +1,14 @@
 import customtkinter as ctk
 from tkinter import messagebox
 import sqlite3
-import hashlib
-import os
+import logging
 from task1_review import run_WebMontoring
 from dashboard import run_dashboard
 import threading
+from log_setup import setup_logging
+import users
+
+logger = logging.getLogger(__name__)
 
 class LoginPage(ctk.CTk):
     def __init__(self):
@@ -37,81 +40,22 @@ class LoginPage(ctk.CTk):
         self.login_btn.pack(pady=20)
         
         # Initialize database and ensure default users exist
-        create_users_table()
         self.ensure_default_users()
     
     def ensure_default_users(self):
         """Ensures default users exist without showing messages."""
         try:
-            conn = sqlite3.connect('users.db')
-            c = conn.cursor()
-            
-            # Check if users exist
-            c.execute('SELECT COUNT(*) FROM users')
-            count = c.fetchone()[0]
-            
-            if count == 0:
-                # Admin user
-                admin_pwd = 'admin'
-                admin_hash = hashlib.sha256(admin_pwd.encode()).hexdigest()
-                c.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
-                        ('admin', admin_hash, 'admin'))
-                
-                # Regular user
-                user_pwd = 'user'
-                user_hash = hashlib.sha256(user_pwd.encode()).hexdigest()
-                c.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
-                        ('user', user_hash, 'user'))
-                
-                conn.commit()
-            
-            conn.close()
+            users.ensure_default_users()
         except Exception as e:
-            print(f"Error ensuring default users: {e}")
+            logger.error(f"Error ensuring default users: {e}")
     
     def reset_database(self):
         """Reset the database and create default users."""
         try:
-            # Close any open connections
-            conn = sqlite3.connect('users.db')
-            conn.close()
-            
-            # Delete existing database
-            if os.path.exists('users.db'):
-                os.remove('users.db')
-                print("Deleted existing database")
-            
-            # Create fresh database
-            create_users_table()
-            
-            # Create default users with plaintext passwords
-            conn = sqlite3.connect('users.db')
-            c = conn.cursor()
-            
-            # Admin user
-            admin_pwd = 'admin'
-            admin_hash = hashlib.sha256(admin_pwd.encode()).hexdigest()
-            c.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
-                    ('admin', admin_hash, 'admin'))
-            
-            # Regular user
-            user_pwd = 'user'
-            user_hash = hashlib.sha256(user_pwd.encode()).hexdigest()
-            c.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
-                    ('user', user_hash, 'user'))
-            
-            conn.commit()
-            
-            # Verify users
-            c.execute('SELECT username, password, role FROM users')
-            users = c.fetchall()
-            print("Recreated database with users:")
-            for user in users:
-                print(f"  Username: {user[0]}, Password hash: {user[1][:10]}..., Role: {user[2]}")
-            
-            conn.close()
+            users.reset_users()
+            logger.info(f"Recreated database with users: {', '.join(name for name, role in users.list_users())}")
         except Exception as e:
-            print(f"Error resetting database: {e}")
+            logger.error(f"Error resetting database: {e}")
     
     def login(self):
         username = self.username_entry.get().strip()
@@ -121,53 +65,18 @@ class LoginPage(ctk.CTk):
             messagebox.showerror("Erreur", "Veuillez remplir tous les champs")
             return
         
-        print(f"Login attempt: Username={username}, Password={password}")
-        
-        # Hash the password
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
-        print(f"Hashed password: {hashed_password}")
+        logger.info(f"Login attempt for {username}")
         
         try:
-            # Check credentials
-            conn = sqlite3.connect('users.db')
-            c = conn.cursor()
-            
-            # Debug: First check if the user exists
-            c.execute('SELECT username FROM users WHERE username = ?', (username,))
-            user_exists = c.fetchone()
-            if not user_exists:
-                print(f"User '{username}' does not exist in database")
-            else:
-                print(f"User '{username}' found in database")
-                
-                # Debug: Check all users and passwords
-                c.execute('SELECT username, password, role FROM users')
-                all_users = c.fetchall()
-                print(f"All users in database:")
-                for user in all_users:
-                    print(f"  Username: {user[0]}, Password hash: {user[1][:10]}..., Role: {user[2]}")
-            
-            # Actual login query
-            c.execute('SELECT role FROM users WHERE username = ? AND password = ?',
-                     (username, hashed_password))
-            result = c.fetchone()
-            
-            if result:
-                print(f"Login successful, role: {result[0]}")
+            # One indexed lookup by username
+            role = users.authenticate(username, password)
+            if role:
+                logger.info(f"Login successful for {username}, role: {role}")
             else:
-                print("Login failed: invalid credentials")
-                
-                # Try without hashing (for debugging)
-                c.execute('SELECT role FROM users WHERE username = ?', (username,))
-                user = c.fetchone()
-                if user:
-                    print(f"User exists but password doesn't match")
-                
-            conn.close()
+                logger.info(f"Login failed for {username}: invalid credentials")
             
             # Continue with normal login flow
-            if result:
-                role = result[0]
+            if role:
                 messagebox.showinfo("Succès", f"Bienvenue, {username}!")
                 self.destroy()  # Close login window
                 
@@ -183,7 +92,7 @@ class LoginPage(ctk.CTk):
                 
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur de connexion: {str(e)}")
-            print(f"Login error: {e}")
+            logger.error(f"Login error: {e}")
 
 class AdminPanel(ctk.CTk):
     def __init__(self):
@@ -287,16 +196,8 @@ class AdminPanel(ctk.CTk):
             return
         
         try:
-            # Hash the password
-            hashed_password = hashlib.sha256(password.encode()).hexdigest()
-            
             # Add user to database
-            conn = sqlite3.connect('users.db')
-            c = conn.cursor()
-            c.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
-                     (username, hashed_password, role))
-            conn.commit()
-            conn.close()
+            users.add_user(username, password, role)
             
             messagebox.showinfo("Succès", "Utilisateur ajouté avec succès")
             
@@ -319,15 +220,8 @@ class AdminPanel(ctk.CTk):
             widget.destroy()
         
         try:
-            # Get users from database
-            conn = sqlite3.connect('users.db')
-            c = conn.cursor()
-            c.execute('SELECT username, role FROM users')
-            users = c.fetchall()
-            conn.close()
-            
             # Add users to list
-            for username, role in users:
+            for username, role in users.list_users():
                 frame = ctk.CTkFrame(self.users_list)
                 frame.pack(fill="x", pady=2, padx=5)
                 
@@ -344,11 +238,7 @@ class AdminPanel(ctk.CTk):
     def delete_user(self, username):
         if messagebox.askyesno("Confirmation", f"Voulez-vous vraiment supprimer {username}?"):
             try:
-                conn = sqlite3.connect('users.db')
-                c = conn.cursor()
-                c.execute('DELETE FROM users WHERE username = ?', (username,))
-                conn.commit()
-                conn.close()
+                users.delete_user(username)
                 
                 messagebox.showinfo("Succès", "Utilisateur supprimé avec succès")
                 self.refresh_users_list()
@@ -368,21 +258,7 @@ class AdminPanel(ctk.CTk):
         dashboard_thread = threading.Thread(target=run_dashboard, daemon=True)
         dashboard_thread.start()
 
-def create_users_table():
-    """Creates the users table if it doesn't already exist."""
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL UNIQUE,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL CHECK(role IN ('admin', 'user'))
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
 if __name__ == "__main__":
+    setup_logging()
     app = LoginPage()
     app.mainloop()
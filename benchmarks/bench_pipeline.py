@@ -0,0 +1,222 @@
+"""Benchmark the monitoring pipeline against a local fixture server.
+
+Runs fetch_html, modify_html, generate_diff and full monitoring iterations
+(status check, fetch, snapshot, diff, status.txt) at several URL counts and
+prints the results as JSON. Results can be compared against a previous run
+to catch regressions in the hot path:
+
+    python benchmarks/bench_pipeline.py --output before.json
+    python benchmarks/bench_pipeline.py --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# Cycles run back to back here: make every one of them hit the fixture server
+os.environ.setdefault("WEBMONITOR_FETCH_FRESHNESS", "0")
+
+from fixture_server import FixtureServer, PAGE_KINDS
+from task1_review import fetch_html, modify_html, generate_diff, run_monitor_cycle
+from latency import timed_get, percentile
+from storage import get_writer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unavailable)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return None
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def summarize(name, latencies, wall, cpu, **extra):
+    values = sorted(latencies)
+    result = {
+        "name": name,
+        "count": len(values),
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "throughput_per_s": round(len(values) / wall, 2) if wall > 0 else None,
+        "latency_ms": {f"p{p}": round(percentile(values, p) * 1000, 3) for p in (50, 95, 99)} if values else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None
+    }
+    result.update(extra)
+    return result
+
+def run_timed(name, jobs, workers=1, **extra):
+    """Run each job (a no-argument callable), timing them individually."""
+    latencies = []
+    lock = threading.Lock()
+
+    def run(job):
+        start = time.perf_counter()
+        job()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if workers <= 1:
+        for job in jobs:
+            run(job)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, jobs))
+    return summarize(name, latencies, time.perf_counter() - wall_start, time.process_time() - cpu_start, **extra)
+
+def mixed_urls(server, count, kinds):
+    return [server.url(kinds[i % len(kinds)], i) for i in range(count)]
+
+def bench_parse(server, repeat):
+    results = []
+    for kind in PAGE_KINDS:
+        html = fetch_html(server.url(kind))
+        excluded = [2, 6, 12]
+        results.append(run_timed(f"modify_html/{kind}", [lambda: modify_html(html, excluded)] * repeat,
+                                 stage="modify_html", kind=kind, page_bytes=len(html.encode('utf-8'))))
+    return results
+
+def bench_diff(server, repeat, work_dir):
+    results = []
+    for kind in PAGE_KINDS:
+        before = modify_html(fetch_html(server.url(kind)), [])
+        # Change a single line in the middle of the page
+        lines = before.splitlines()
+        lines[len(lines) // 2] += "<span>modifié</span>"
+        after = "\n".join(lines)
+        diff_path = os.path.join(work_dir, f"diff_{kind}.txt")
+        results.append(run_timed(f"generate_diff/{kind}", [lambda: generate_diff(before, after, diff_path)] * repeat,
+                                 stage="generate_diff", kind=kind, page_bytes=len(before.encode('utf-8'))))
+    return results
+
+def bench_fetch(server, url_count, kinds, workers):
+    urls = mixed_urls(server, url_count, kinds)
+    return run_timed(f"fetch_html/{url_count}", [lambda u=u: fetch_html(u) for u in urls],
+                     workers=min(workers, url_count), stage="fetch_html", urls=url_count)
+
+def bench_monitor_loop(server, url_count, kinds, cycles, work_dir):
+    """One thread per URL, like WebMonitorApp, each running `cycles` iterations back to back."""
+    urls = mixed_urls(server, url_count, kinds)
+    latencies = []
+    lock = threading.Lock()
+
+    def monitor(index, url):
+        output_dir = os.path.join(work_dir, f"loop_{url_count}", str(index))
+        os.makedirs(output_dir, exist_ok=True)
+        base_html = modify_html(fetch_html(url), [])
+        for iteration in range(1, cycles + 1):
+            start = time.perf_counter()
+            response = timed_get(url, timeout=30)
+            base_html, _ = run_monitor_cycle(url, "Low", [], output_dir, iteration, base_html, "Up", "80",
+                                             timings=response['timings'])
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=monitor, args=(i, url), daemon=True) for i, url in enumerate(urls)]
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    get_writer().flush()
+    return summarize(f"monitor_loop/{url_count}", latencies, time.perf_counter() - wall_start,
+                     time.process_time() - cpu_start, stage="monitor_loop", urls=url_count, cycles=cycles)
+
+def compare(results, baseline_path, threshold):
+    """Print regressions against a previous results file; return True if any were found."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressed = False
+    for result in results:
+        old = baseline.get(result["name"])
+        if not old or not old.get("latency_ms") or not result.get("latency_ms"):
+            continue
+        old_p95, new_p95 = old["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        change = (new_p95 - old_p95) / old_p95 if old_p95 else 0.0
+        marker = "REGRESSION" if change > threshold else "ok"
+        regressed = regressed or change > threshold
+        print(f"{marker:>10}  {result['name']:<28} p95 {old_p95:>10.3f} -> {new_p95:>10.3f} ms ({change:+.1%})",
+              file=sys.stderr)
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WebSiteWatcher monitoring pipeline.")
+    parser.add_argument("--sizes", default="10,100,1000", help="comma-separated URL counts")
+    parser.add_argument("--kinds", default="small,changing,recorded,minified",
+                        help="page kinds mixed into the scaled fetch/loop runs")
+    parser.add_argument("--repeat", type=int, default=20, help="repetitions for the parse and diff benchmarks")
+    parser.add_argument("--cycles", type=int, default=3, help="iterations per URL in the monitoring loop")
+    parser.add_argument("--workers", type=int, default=32, help="concurrent fetches in the fetch benchmark")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="previous results file to compare p95 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95 slowdown before failing")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    kinds = [k for k in args.kinds.split(",") if k]
+    work_dir = tempfile.mkdtemp(prefix="webmonitor_bench_")
+    results = []
+    try:
+        with FixtureServer() as server:
+            results.extend(bench_parse(server, args.repeat))
+            results.extend(bench_diff(server, args.repeat, work_dir))
+            for size in sizes:
+                results.append(bench_fetch(server, size, kinds, args.workers))
+            for size in sizes:
+                results.append(bench_monitor_loop(server, size, kinds, args.cycles, work_dir))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args)
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Local HTTP server serving deterministic pages for the monitoring benchmarks.
+
+Routes (the trailing <n> lets every benchmark URL be distinct):
+    /small/<n>      ~2 KB page
+    /large/<n>      ~2 MB page with thousands of elements
+    /minified/<n>   ~200 KB page on a single line
+    /changing/<n>   ~50 KB page where one section changes on every request
+    /recorded/<n>   snapshots captured under test1/
+"""
+import os
+import glob
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGE_KINDS = ("small", "large", "minified", "changing", "recorded")
+
+def _article(rng, index):
+    words = " ".join(rng.choice(("prix", "banque", "service", "client", "offre", "compte", "taux", "actualité"))
+                     for _ in range(rng.randint(10, 40)))
+    return (f'<div class="article" id="a{index}">\n'
+            f'  <h2>Titre {index}</h2>\n'
+            f'  <p>{words}</p>\n'
+            f'  <a href="/page/{index}">Lire la suite</a>\n'
+            f'</div>\n')
+
+def synthetic_page(target_size, seed=0):
+    """Build a deterministic HTML page of roughly target_size bytes."""
+    rng = random.Random(seed)
+    parts = ['<!DOCTYPE html>\n<html lang="fr">\n<head><title>Fixture</title></head>\n<body>\n']
+    size = len(parts[0])
+    index = 0
+    while size < target_size:
+        part = _article(rng, index)
+        parts.append(part)
+        size += len(part)
+        index += 1
+    parts.append('</body>\n</html>\n')
+    return "".join(parts)
+
+def _recorded_pages():
+    pattern = os.path.join(REPO_DIR, "test1", "*", "*.html")
+    pages = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages or [synthetic_page(80_000, seed=4)]
+
+class FixturePages:
+    """Pre-rendered page bodies, built once per server."""
+
+    def __init__(self):
+        self.small = synthetic_page(2_000, seed=1).encode('utf-8')
+        self.large = synthetic_page(2_000_000, seed=2).encode('utf-8')
+        self.minified = synthetic_page(200_000, seed=3).replace("\n", "").encode('utf-8')
+        self.changing_template = synthetic_page(50_000, seed=5)
+        self.recorded = [page.encode('utf-8') for page in _recorded_pages()]
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def body(self, kind, number):
+        if kind == "small":
+            return self.small
+        if kind == "large":
+            return self.large
+        if kind == "minified":
+            return self.minified
+        if kind == "changing":
+            with self.lock:
+                self.counter += 1
+                counter = self.counter
+            section = f'<div id="live">Mise à jour {counter}</div>\n'
+            return self.changing_template.replace("<body>\n", "<body>\n" + section, 1).encode('utf-8')
+        if kind == "recorded":
+            return self.recorded[number % len(self.recorded)]
+        return None
+
+def _make_handler(pages):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            number = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+            body = pages.body(parts[0], number)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+class FixtureServer:
+    """Run the fixture server on a free local port in a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.pages = FixturePages()
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self.pages))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, kind, number=0):
+        return f"{self.base_url}/{kind}/{number}"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
+
+if __name__ == "__main__":
+    with FixtureServer(port=8765) as server:
+        print(f"Serving fixtures on {server.base_url} ({', '.join(PAGE_KINDS)}) - Ctrl+C to stop")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
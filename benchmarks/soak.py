@@ -0,0 +1,171 @@
+"""Soak test of continuous monitoring against the local fixture server.
+
+Runs one monitor thread per URL the way continuous mode does (saved state,
+window of unchanged cycles) for hours, samples the process's resident
+memory, open file descriptors, threads and output size, and fails if
+memory or descriptors keep growing once warmed up:
+
+    python benchmarks/soak.py --urls 1000 --hours 72 --output soak.jsonl
+    python benchmarks/soak.py --urls 50 --hours 0.25 --interval 5
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# Monitors of distinct URLs never share fetches here
+os.environ.setdefault("WEBMONITOR_FETCH_FRESHNESS", "0")
+
+from fixture_server import FixtureServer
+
+def rss_mb():
+    """Current resident set size of this process, in MB (None if unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+def open_fds():
+    """Open file descriptors (handles on Windows) of this process (None if unavailable)."""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        pass
+    try:
+        import psutil
+        process = psutil.Process()
+        return process.num_handles() if sys.platform == "win32" else process.num_fds()
+    except Exception:
+        return None
+
+def slope_per_hour(samples, key):
+    """Least-squares growth of samples[key] per hour."""
+    points = [(sample["elapsed"] / 3600, sample[key]) for sample in samples if sample.get(key) is not None]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance if variance else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test of continuous WebSiteWatcher monitoring.")
+    parser.add_argument("--urls", type=int, default=1000, help="monitored URLs, one thread each")
+    parser.add_argument("--hours", type=float, default=72, help="test duration")
+    parser.add_argument("--interval", type=int, default=30, help="seconds between two cycles of a monitor")
+    parser.add_argument("--kinds", default="small,changing,recorded", help="page kinds the URLs cycle through")
+    parser.add_argument("--keep-cycles", type=int, default=50, help="unchanged cycles kept per run")
+    parser.add_argument("--sample", type=float, default=60, help="seconds between two resource samples")
+    parser.add_argument("--warmup", type=float, default=0.1, help="fraction of the run ignored in the verdict")
+    parser.add_argument("--max-rss-growth", type=float, default=5.0, help="allowed RSS growth, MB per hour")
+    parser.add_argument("--max-fd-growth", type=float, default=1.0, help="allowed descriptor growth per hour")
+    parser.add_argument("--output", help="append samples to this JSONL file")
+    args = parser.parse_args()
+
+    # The run catalog lives in the working directory: keep this one out of the repository
+    work_dir = tempfile.mkdtemp(prefix="webmonitor_soak_")
+    os.chdir(work_dir)
+    from task1_review import run_monitor_cycle, page_view, fetch_shared
+    from storage import CycleWindow, get_writer
+    from doccache import content_hash
+
+    kinds = [k for k in args.kinds.split(",") if k]
+    stop_event = threading.Event()
+    counters = {"cycles": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def monitor(index, url):
+        output_dir = os.path.join(work_dir, "runs", str(index))
+        os.makedirs(output_dir, exist_ok=True)
+        window = CycleWindow(args.keep_cycles)
+        base_html = None
+        state = None
+        iteration = 0
+        # Spread the first checks over one interval, like monitors started from the config
+        if stop_event.wait(random.uniform(0, args.interval)):
+            return
+        while not stop_event.is_set():
+            iteration += 1
+            try:
+                if base_html is None:
+                    base_html = page_view(url, fetch_shared(url), [])
+                    state = {"baseline_hash": content_hash(base_html), "settings": {"excluded": [], "selectors": None}}
+                base_html, _ = run_monitor_cycle(url, "Low", [], output_dir, iteration, base_html, "Up", "80",
+                                                 state=state, window=window)
+                with lock:
+                    counters["cycles"] += 1
+            except Exception:
+                with lock:
+                    counters["errors"] += 1
+            stop_event.wait(args.interval)
+
+    samples = []
+    output = open(args.output, 'a', encoding='utf-8') if args.output else None
+    try:
+        with FixtureServer() as server:
+            urls = [server.url(kinds[i % len(kinds)], i) for i in range(args.urls)]
+            threads = [threading.Thread(target=monitor, args=(i, url), daemon=True) for i, url in enumerate(urls)]
+            start = time.time()
+            for thread in threads:
+                thread.start()
+            end = start + args.hours * 3600
+            while time.time() < end:
+                time.sleep(min(args.sample, max(0.0, end - time.time())))
+                with lock:
+                    sample = dict(counters)
+                sample.update(elapsed=time.time() - start, rss_mb=rss_mb(), fds=open_fds(),
+                              threads=threading.active_count(),
+                              output_mb=sum(os.path.getsize(os.path.join(directory, name))
+                                            for directory, _, files in os.walk(os.path.join(work_dir, "runs"))
+                                            for name in files) / (1024 * 1024))
+                samples.append(sample)
+                if output:
+                    output.write(json.dumps(sample) + "\n")
+                    output.flush()
+                print(f"{sample['elapsed'] / 3600:6.2f} h  rss {sample['rss_mb'] or 0:8.1f} MB  fds {sample['fds']}  "
+                      f"cycles {sample['cycles']}  errors {sample['errors']}  output {sample['output_mb']:.1f} MB",
+                      file=sys.stderr)
+            stop_event.set()
+            for thread in threads:
+                thread.join(timeout=args.interval + 30)
+            get_writer().flush()
+    finally:
+        if output:
+            output.close()
+        os.chdir(REPO_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    steady = [sample for sample in samples if sample["elapsed"] >= args.warmup * args.hours * 3600]
+    verdict = {
+        "urls": args.urls,
+        "hours": args.hours,
+        "cycles": samples[-1]["cycles"] if samples else 0,
+        "errors": samples[-1]["errors"] if samples else 0,
+        "rss_growth_mb_per_hour": round(slope_per_hour(steady, "rss_mb"), 3),
+        "fd_growth_per_hour": round(slope_per_hour(steady, "fds"), 3),
+        "output_growth_mb_per_hour": round(slope_per_hour(steady, "output_mb"), 3)
+    }
+    verdict["passed"] = (verdict["rss_growth_mb_per_hour"] <= args.max_rss_growth and
+                         verdict["fd_growth_per_hour"] <= args.max_fd_growth)
+    print(json.dumps(verdict, indent=2))
+    if not verdict["passed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Import many sites into monitored_urls.json at once.
+
+Reads URLs from a CSV file (a "url" column, or the URL in the first column;
+optional danger_level, output_dir, interval, excluded_tags and watch_selectors
+columns, selectors separated by ";"), a JSON file (a list of URLs or of site
+entries) or stdin, one URL per line.
+URLs are validated and deduplicated after normalization, every page is
+fetched with bounded parallelism to index its tags and suggest exclusions,
+and the new sites are written in a single atomic configuration update:
+
+    python bulk_import.py portfolio.csv --danger-level Medium --output-dir C:/pfe/WebMonitor_Output
+    cat urls.txt | python bulk_import.py - --dry-run
+"""
+import io
+import re
+import sys
+import csv
+import json
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from bs4 import BeautifulSoup
+
+from config import get_config
+from urlutils import validate_url, normalize_url
+from regions import selector_error
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+DANGER_LEVELS = ("Low", "Medium", "High", "Critical")
+
+# Tags whose content changes on every load or is not part of the visible page
+VOLATILE_TAGS = {"script", "style", "noscript", "iframe"}
+# id/class/name words that usually mark ads, consent banners, clocks and counters
+VOLATILE_ATTRIBUTE = re.compile(
+    r"(^|[-_ ])(ads?|advert\w*|banner|cookies?|consent|timestamp|clock|date|time|live|ticker|"
+    r"counter|carousel|csrf|token|nonce)([-_ ]|$)", re.IGNORECASE)
+
+def parse_rows(text, fmt):
+    """Turn the raw input into a list of dicts with at least a "url" key."""
+    if fmt == "json":
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get("sites", [])
+        return [item if isinstance(item, dict) else {"url": str(item)} for item in data]
+    reader = csv.reader(io.StringIO(text))
+    rows = [row for row in reader if row and any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    if "url" in header:
+        return [{key: cell.strip() for key, cell in zip(header, row)} for row in rows[1:]]
+    return [{"url": row[0].strip()} for row in rows if not row[0].lstrip().startswith("#")]
+
+def read_rows(source):
+    """Read rows from a file path, or from stdin when source is "-"."""
+    if source == "-":
+        text = sys.stdin.read()
+        fmt = "json" if text.lstrip().startswith(("[", "{")) else "csv"
+    else:
+        with open(source, 'r', encoding='utf-8-sig') as f:
+            text = f.read()
+        fmt = "json" if source.lower().endswith(".json") else "csv"
+    return parse_rows(text, fmt)
+
+def _parse_tags(value):
+    if isinstance(value, list):
+        return [int(v) for v in value]
+    return [int(v) for v in re.split(r"[;, ]+", str(value)) if v]
+
+def prepare_entries(rows, existing_urls=(), danger_level="Low", output_dir=None):
+    """Validate and deduplicate rows.
+
+    Returns (entries, rejected): site entries keyed by normalized URL, and
+    {"row", "url", "reason"} dicts for every row that was dropped.
+    """
+    seen = {normalize_url(url) for url in existing_urls if not validate_url(url)}
+    entries, rejected = [], []
+    for number, row in enumerate(rows, start=1):
+        url = row.get("url") or ""
+        # JSON rows can hold any type: only text is a URL
+        if isinstance(url, str):
+            url = url.strip()
+            reason = validate_url(url)
+        else:
+            url, reason = str(url), f"URL invalide: {type(url).__name__} au lieu de texte"
+        if reason is None:
+            url = normalize_url(url)
+            if url in seen:
+                reason = "Doublon ou déjà surveillé"
+        level = row.get("danger_level") or danger_level
+        if reason is None and level not in DANGER_LEVELS:
+            reason = f"Niveau de danger invalide: {level}"
+        entry = {"url": url, "danger_level": level}
+        try:
+            if row.get("excluded_tags"):
+                entry["excluded_tags"] = _parse_tags(row["excluded_tags"])
+            if row.get("interval"):
+                entry["interval"] = int(row["interval"])
+                if entry["interval"] <= 0:
+                    raise ValueError(f"intervalle {entry['interval']} (minutes, doit être positif)")
+            if row.get("watch_selectors"):
+                selectors = row["watch_selectors"]
+                if not isinstance(selectors, list):
+                    selectors = [selector.strip() for selector in selectors.split(";") if selector.strip()]
+                errors = [error for error in map(selector_error, selectors) if error]
+                if errors:
+                    raise ValueError("; ".join(errors))
+                entry["watch_selectors"] = selectors
+        except (TypeError, ValueError, AttributeError) as e:
+            reason = reason or f"Valeur invalide: {e}"
+        if row.get("output_dir") or output_dir:
+            entry["output_dir"] = row.get("output_dir") or output_dir
+        if reason:
+            rejected.append({"row": number, "url": url, "reason": reason})
+            continue
+        seen.add(url)
+        entries.append(entry)
+    return entries, rejected
+
+def discover_tags(html):
+    """Index the page's tags the way modify_html does and suggest volatile ones to exclude.
+
+    Descendants of a suggested tag are not listed, since excluding the tag
+    already removes them.
+    """
+    tags = BeautifulSoup(html, 'html.parser').find_all()
+    suggested, excluded = [], set()
+    for index, tag in enumerate(tags):
+        if any(id(parent) in excluded for parent in tag.parents):
+            continue
+        words = [tag.get("id") or "", tag.get("name") or ""] + list(tag.get("class") or [])
+        if tag.name in VOLATILE_TAGS or any(VOLATILE_ATTRIBUTE.search(word) for word in words if word):
+            suggested.append(index)
+            excluded.add(id(tag))
+    return {"tag_count": len(tags), "suggested_excluded": suggested}
+
+def discover_all(entries, workers=16, progress=None):
+    """Fetch every entry's page concurrently; return {url: discovery or {"error"}}.
+
+    progress(done, total) is called after each page.
+    """
+    from task1_review import fetch_html
+
+    def discover(url):
+        return discover_tags(fetch_html(url))
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(discover, entry["url"]): entry["url"] for entry in entries}
+        for done, future in enumerate(as_completed(futures), start=1):
+            url = futures[future]
+            try:
+                results[url] = future.result()
+            except Exception as e:
+                logger.warning(f"Tag discovery failed for {url}: {e}")
+                results[url] = {"error": str(e)}
+            if progress:
+                progress(done, len(futures))
+    return results
+
+def import_sites(rows, danger_level="Low", output_dir=None, discover=True, apply_suggestions=False,
+                 workers=16, dry_run=False, progress=None, config=None):
+    """Validate, discover and add rows to the configuration in one update; return a report.
+
+    Discovered exclusions are saved as suggested_excluded_tags; they only
+    become excluded_tags with apply_suggestions.
+    """
+    config = config or get_config()
+    entries, rejected = prepare_entries(rows, [site["url"] for site in config.sites()], danger_level, output_dir)
+    failed = []
+    if discover and entries:
+        discoveries = discover_all(entries, workers, progress)
+        for entry in entries:
+            found = discoveries.get(entry["url"], {})
+            if "error" in found:
+                failed.append({"url": entry["url"], "reason": found["error"]})
+                continue
+            entry["tag_count"] = found["tag_count"]
+            entry["suggested_excluded_tags"] = found["suggested_excluded"]
+            if apply_suggestions and "excluded_tags" not in entry:
+                entry["excluded_tags"] = found["suggested_excluded"]
+
+    added = []
+    if entries and not dry_run:
+        def mutate(sites):
+            # Another writer may have added some of these since the config was read
+            present = {normalize_url(site["url"]) for site in sites if not validate_url(site["url"])}
+            for entry in entries:
+                if entry["url"] in present:
+                    rejected.append({"row": None, "url": entry["url"], "reason": "Doublon ou déjà surveillé"})
+                    continue
+                sites.append(entry)
+                added.append(entry)
+        config.update(mutate)
+    return {
+        "added": added if not dry_run else entries,
+        "rejected": rejected,
+        "discovery_failed": failed,
+        "dry_run": dry_run
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Importer des sites dans monitored_urls.json.")
+    parser.add_argument("source", help="fichier CSV ou JSON, ou - pour lire les URLs sur stdin")
+    parser.add_argument("--danger-level", default="Low", choices=DANGER_LEVELS,
+                        help="niveau de danger des lignes qui n'en précisent pas")
+    parser.add_argument("--output-dir", help="dossier de sortie des lignes qui n'en précisent pas")
+    parser.add_argument("--workers", type=int, default=16, help="pages récupérées en parallèle")
+    parser.add_argument("--no-discover", action="store_true", help="ne pas récupérer les pages")
+    parser.add_argument("--apply-suggestions", action="store_true",
+                        help="exclure les balises suggérées des sites qui n'en précisent pas")
+    parser.add_argument("--dry-run", action="store_true", help="afficher le résultat sans modifier la configuration")
+    args = parser.parse_args()
+    setup_logging()
+
+    def progress(done, total):
+        if done % 50 == 0 or done == total:
+            print(f"{done}/{total} pages analysées", file=sys.stderr)
+
+    report = import_sites(read_rows(args.source), args.danger_level, args.output_dir,
+                          discover=not args.no_discover, apply_suggestions=args.apply_suggestions,
+                          workers=args.workers, dry_run=args.dry_run, progress=progress)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"{len(report['added'])} sites ajoutés, {len(report['rejected'])} rejetés, "
+          f"{len(report['discovery_failed'])} pages inaccessibles", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
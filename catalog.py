@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import time
+import logging
+
+from db import Database
+
+logger = logging.getLogger(__name__)
+
+# Index of monitoring runs shared by the monitor and the dashboard
+CATALOG_DB = os.path.join(os.getcwd(), "monitoring.db")
+
+CATALOG_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS runs (
+        run_dir TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        output_root TEXT NOT NULL,
+        started_at REAL NOT NULL,
+        latest_iteration INTEGER NOT NULL DEFAULT 0,
+        latest_manifest TEXT,
+        heartbeat REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_runs_url_started ON runs (url, started_at);
+    CREATE TABLE IF NOT EXISTS heartbeats (
+        run_dir TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        pid INTEGER NOT NULL,
+        next_check REAL NOT NULL,
+        last_cycle_duration REAL,
+        updated_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_heartbeats_expires ON heartbeats (expires_at);
+    CREATE TABLE IF NOT EXISTS monitor_state (
+        url TEXT PRIMARY KEY,
+        run_dir TEXT NOT NULL,
+        iteration INTEGER NOT NULL,
+        baseline_hash TEXT NOT NULL,
+        settings TEXT NOT NULL,
+        last_check REAL NOT NULL
+    );
+'''
+
+CATALOG = Database(CATALOG_DB, CATALOG_SCHEMA)
+
+def get_connection():
+    """Return this thread's connection to the catalog, creating the schema on first use."""
+    return CATALOG.connection()
+
+def checkpoint():
+    """Truncate the catalog's write-ahead log (see Database.checkpoint)."""
+    return CATALOG.checkpoint()
+
+def register_run(url, run_dir, output_root, started_at=None):
+    """Record a new monitoring run directory for url."""
+    started_at = started_at or time.time()
+    conn = get_connection()
+    conn.execute('INSERT OR IGNORE INTO runs (run_dir, url, output_root, started_at, heartbeat) VALUES (?, ?, ?, ?, ?)',
+                 (run_dir, url, output_root, started_at, started_at))
+    conn.commit()
+
+def record_cycle(run_dir, manifest, state=None):
+    """Store the manifest of the cycle just committed in run_dir, and the monitor state it leaves."""
+    conn = get_connection()
+    if manifest is not None:
+        conn.execute('UPDATE runs SET latest_iteration = ?, latest_manifest = ?, heartbeat = ? WHERE run_dir = ?',
+                     (manifest.get("iteration", 0), json.dumps(manifest), manifest.get("time", time.time()),
+                      run_dir))
+    if state is not None:
+        conn.execute('INSERT OR REPLACE INTO monitor_state (url, run_dir, iteration, baseline_hash, settings, '
+                     'last_check) VALUES (?, ?, ?, ?, ?, ?)',
+                     (state["url"], run_dir, state["iteration"], state["baseline_hash"],
+                      json.dumps(state["settings"], sort_keys=True), state["last_check"]))
+    conn.commit()
+
+def load_state(url):
+    """Return the state the last cycle of url's monitor left (see record_cycle), or None."""
+    conn = get_connection()
+    row = conn.execute('SELECT run_dir, iteration, baseline_hash, settings, last_check FROM monitor_state '
+                       'WHERE url = ?', (url,)).fetchone()
+    if row is None:
+        return None
+    run_dir, iteration, baseline_hash, settings, last_check = row
+    return {"url": url, "run_dir": run_dir, "iteration": iteration, "baseline_hash": baseline_hash,
+            "settings": json.loads(settings), "last_check": last_check}
+
+def latest_runs():
+    """Return {url: run} for the most recent run of every URL, in a single query."""
+    conn = get_connection()
+    rows = conn.execute('''
+        SELECT url, run_dir, output_root, started_at, latest_iteration, latest_manifest, heartbeat
+        FROM runs r
+        WHERE started_at = (SELECT MAX(started_at) FROM runs WHERE url = r.url)
+    ''').fetchall()
+    runs = {}
+    for url, run_dir, output_root, started_at, iteration, manifest, heartbeat in rows:
+        runs[url] = {
+            "run_dir": run_dir,
+            "output_root": output_root,
+            "started_at": started_at,
+            "latest_iteration": iteration,
+            "manifest": json.loads(manifest) if manifest else None,
+            "heartbeat": heartbeat
+        }
+    return runs
+
+def runs_for(url):
+    """Return every run of url, oldest first."""
+    conn = get_connection()
+    rows = conn.execute('SELECT run_dir, output_root, started_at, latest_iteration, latest_manifest, heartbeat '
+                        'FROM runs WHERE url = ? ORDER BY started_at', (url,)).fetchall()
+    return [{
+        "run_dir": run_dir,
+        "output_root": output_root,
+        "started_at": started_at,
+        "latest_iteration": iteration,
+        "manifest": json.loads(manifest) if manifest else None,
+        "heartbeat": heartbeat
+    } for run_dir, output_root, started_at, iteration, manifest, heartbeat in rows]
+
+def forget_run(run_dir):
+    """Remove a run whose directory was archived or deleted."""
+    conn = get_connection()
+    conn.execute('DELETE FROM runs WHERE run_dir = ?', (run_dir,))
+    conn.commit()
+
+# Extra time a monitor gets past its next scheduled check before its heartbeat expires
+HEARTBEAT_GRACE = 60
+
+def publish_heartbeat(url, run_dir, next_check, last_cycle_duration=None, grace=None):
+    """Announce that the monitor writing run_dir is alive and when it will check next.
+
+    The heartbeat expires grace seconds (at least HEARTBEAT_GRACE) after
+    next_check; a monitor starting a cycle passes the longest the cycle can take.
+    """
+    now = time.time()
+    expires_at = next_check + max(HEARTBEAT_GRACE, grace or 0)
+    conn = get_connection()
+    conn.execute('INSERT OR REPLACE INTO heartbeats (run_dir, url, pid, next_check, last_cycle_duration, '
+                 'updated_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                 (run_dir, url, os.getpid(), next_check, last_cycle_duration, now, expires_at))
+    # Expire monitors that stopped without clearing their entry (crash, killed process)
+    conn.execute('DELETE FROM heartbeats WHERE expires_at < ?', (now,))
+    conn.commit()
+
+def clear_heartbeat(run_dir):
+    """Remove the heartbeat of a monitor that stopped cleanly."""
+    conn = get_connection()
+    conn.execute('DELETE FROM heartbeats WHERE run_dir = ?', (run_dir,))
+    conn.commit()
+
+def live_monitors():
+    """Return {url: heartbeat} for every monitor whose heartbeat has not expired."""
+    conn = get_connection()
+    rows = conn.execute('SELECT url, run_dir, pid, next_check, last_cycle_duration, updated_at FROM heartbeats '
+                        'WHERE expires_at >= ? ORDER BY updated_at', (time.time(),)).fetchall()
+    monitors = {}
+    for url, run_dir, pid, next_check, last_cycle_duration, updated_at in rows:
+        monitors[url] = {
+            "run_dir": run_dir,
+            "pid": pid,
+            "next_check": next_check,
+            "last_cycle_duration": last_cycle_duration,
+            "updated_at": updated_at
+        }
+    return monitors
+
+def run_dir_prefix(url):
+    """Directory-name prefix monitor_website uses for url's runs."""
+    return url.replace('://', '_').replace('/', '_')
+
+# Suffix monitor_website appends to the prefix: _YYYYmmdd_HHMMSS
+RUN_SUFFIX = re.compile(r"_\d{8}_\d{6}$")
+
+def index_existing_runs(output_root, urls):
+    """Add runs created before the catalog existed (one directory scan per output root)."""
+    # storage imports this module
+    from storage import read_manifest
+    if not os.path.isdir(output_root):
+        return
+    conn = get_connection()
+    known = {row[0] for row in conn.execute('SELECT run_dir FROM runs WHERE output_root = ?', (output_root,))}
+    entries = os.listdir(output_root)
+    for url in urls:
+        prefix = run_dir_prefix(url)
+        for name in entries:
+            run_dir = os.path.join(output_root, name)
+            if not name.startswith(prefix) or not RUN_SUFFIX.fullmatch(name[len(prefix):]):
+                continue
+            if run_dir in known or not os.path.isdir(run_dir):
+                continue
+            try:
+                started_at = time.mktime(time.strptime(name[-15:], "%Y%m%d_%H%M%S"))
+                heartbeat = max((os.path.getmtime(os.path.join(run_dir, f)) for f in os.listdir(run_dir)),
+                                default=started_at)
+            except OSError as e:
+                logger.warning(f"Skipping {run_dir} while indexing runs: {e}")
+                continue
+            # The manifest is replaced atomically after each cycle's files: it names a complete cycle
+            manifest = read_manifest(run_dir)
+            conn.execute('INSERT OR IGNORE INTO runs (run_dir, url, output_root, started_at, latest_iteration, '
+                         'latest_manifest, heartbeat) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (run_dir, url, output_root, started_at, manifest.get("iteration", 0) if manifest else 0,
+                          json.dumps(manifest) if manifest else None, heartbeat))
+    conn.commit()
@@ -0,0 +1,232 @@
+import os
+import atexit
+import json
+import copy
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from storage import atomic_write
+from urlutils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # Not on Linux, or the optional package is not installed
+    INotify = None
+
+# Shared list of monitored sites
+CONFIG_FILE = os.path.join(os.getcwd(), "monitored_urls.json")
+
+# A lock file older than this is assumed to belong to a crashed writer
+LOCK_STALE_SECONDS = 30
+
+def site_key(url):
+    """Key sites are matched by, so "https://x.com" and "https://x.com/" are the same site."""
+    try:
+        return normalize_url(url)
+    except ValueError:
+        return url
+
+def diff_sites(old_sites, new_sites):
+    """Compare two site lists by URL; return (added, removed, changed) entry lists."""
+    old = {site["url"]: site for site in old_sites}
+    new = {site["url"]: site for site in new_sites}
+    added = [site for url, site in new.items() if url not in old]
+    removed = [site for url, site in old.items() if url not in new]
+    changed = [site for url, site in new.items() if url in old and old[url] != site]
+    return added, removed, changed
+
+class ConfigService:
+    """Cached view of monitored_urls.json that reloads itself when the file changes.
+
+    The file is watched with inotify when inotify_simple is available and by
+    polling its modification time otherwise. Subscribers are told which
+    entries were added, removed or changed, so running monitors can be
+    adjusted without restarting the others. Writes are read-modify-write
+    under a lock file and land through an atomic rename, so two windows or
+    processes cannot clobber each other's changes.
+    """
+
+    def __init__(self, path=CONFIG_FILE, poll_interval=2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.lock = threading.RLock()
+        self._sites = []
+        self._by_url = {}
+        self._stamp = None
+        self._subscribers = []
+        self._stop = threading.Event()
+        self.reload()
+        self._watcher = threading.Thread(target=self._watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            return None
+
+    def _read_file(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _apply(self, sites, stamp):
+        """Swap in a new site list and notify subscribers of what changed."""
+        with self.lock:
+            added, removed, changed = diff_sites(self._sites, sites)
+            self._sites = sites
+            self._by_url = {site_key(site["url"]): site for site in sites}
+            self._stamp = stamp
+            subscribers = list(self._subscribers)
+        if added or removed or changed:
+            for callback in subscribers:
+                try:
+                    callback(copy.deepcopy(added), copy.deepcopy(removed), copy.deepcopy(changed))
+                except Exception as e:
+                    logger.error(f"Error in configuration subscriber: {e}")
+
+    def reload(self):
+        """Re-read the file if it changed since the last load; return True if it did."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp and self._stamp is not None:
+            return False
+        try:
+            sites = self._read_file()
+        except Exception as e:
+            # Keep the last good configuration while the file is being edited
+            logger.error(f"Error loading monitored URLs: {e}")
+            return False
+        self._apply(sites, stamp)
+        return True
+
+    def _watch(self):
+        if INotify is not None:
+            try:
+                self._watch_inotify()
+                return
+            except OSError as e:
+                logger.warning(f"inotify unavailable, polling {self.path} instead: {e}")
+        while not self._stop.wait(self.poll_interval):
+            if self.reload():
+                logger.info(f"Reloaded {self.path}")
+
+    def _watch_inotify(self):
+        # Watch the directory: an atomic replace gives the file a new inode
+        inotify = INotify()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        name = os.path.basename(self.path)
+        inotify.add_watch(directory, inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE)
+        while not self._stop.is_set():
+            events = inotify.read(timeout=int(self.poll_interval * 1000))
+            if any(event.name == name for event in events) and self.reload():
+                logger.info(f"Reloaded {self.path}")
+
+    def stop(self):
+        """Stop the watcher thread; it exits within one poll interval."""
+        self._stop.set()
+
+    def subscribe(self, callback):
+        """Call callback(added, removed, changed) whenever the site list changes."""
+        with self.lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def sites(self):
+        """Return a copy of the monitored sites list."""
+        with self.lock:
+            return copy.deepcopy(self._sites)
+
+    def get(self, url):
+        """Return a copy of the entry for url (in any equivalent spelling), or None."""
+        with self.lock:
+            site = self._by_url.get(site_key(url))
+            return copy.deepcopy(site) if site else None
+
+    @contextmanager
+    def _file_lock(self, timeout=10):
+        """Serialize writers across threads and processes with a lock file."""
+        lock_path = self.path + ".lock"
+        deadline = time.time() + timeout
+        with self.lock:
+            while True:
+                try:
+                    fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    try:
+                        if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                            os.remove(lock_path)
+                            continue
+                    except OSError:
+                        continue
+                    if time.time() > deadline:
+                        raise TimeoutError(f"Timed out waiting for {lock_path}")
+                    time.sleep(0.05)
+            try:
+                os.write(fd, str(os.getpid()).encode())
+                yield
+            finally:
+                os.close(fd)
+                os.remove(lock_path)
+
+    def update(self, mutate):
+        """Apply mutate(sites) to the latest on-disk list and write it back atomically.
+
+        mutate receives a fresh copy read under the lock and either edits it
+        in place or returns a new list.
+        """
+        with self._file_lock():
+            sites = self._read_file()
+            result = mutate(sites)
+            if result is not None:
+                sites = result
+            atomic_write(self.path, json.dumps(sites, indent=4))
+            stamp = self._file_stamp()
+        # Notify outside the lock so subscribers may read or write the config themselves
+        self._apply(copy.deepcopy(sites), stamp)
+        return sites
+
+    def upsert_site(self, entry):
+        """Add entry, or merge its keys into the existing entry for the same URL.
+
+        An existing entry keeps its own spelling of the URL.
+        """
+        key = site_key(entry["url"])
+        def mutate(sites):
+            for site in sites:
+                if site_key(site["url"]) == key:
+                    site.update(entry, url=site["url"])
+                    return
+            sites.append(entry)
+        return self.update(mutate)
+
+    def remove_site(self, url):
+        key = site_key(url)
+        return self.update(lambda sites: [site for site in sites if site_key(site["url"]) != key])
+
+    def save(self, sites):
+        """Replace the whole list (prefer upsert_site/remove_site, which merge concurrent edits)."""
+        return self.update(lambda _: copy.deepcopy(sites))
+
+_config = None
+_config_lock = threading.Lock()
+
+def get_config():
+    """Return the process-wide configuration service."""
+    global _config
+    with _config_lock:
+        if _config is None:
+            _config = ConfigService()
+            # Windows come and go within one process: the watcher lives until the process exits
+            atexit.register(_config.stop)
+        return _config
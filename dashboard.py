@@ -1,14 +1,52 @@
 import customtkinter as ctk
 import os
+import json
 import time
+import logging
 import threading
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import messagebox
 import socket
+import ssl
 import requests
 from urllib.parse import urlparse
 from bs4 import BeautifulSoup
-import html2text
+from latency import shared_timed_get, LatencyTracker, format_timings, get_slo, DEFAULT_SLO
+import catalog
+from config import get_config
+from structdiff import format_changes
+from diffrender import DIFFS
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Status updates kept in memory, and shown per page
+FEED_SIZE = int(os.environ.get("WEBMONITOR_FEED_SIZE", "500"))
+FEED_PAGE_SIZE = 25
+
+class EventFeed:
+    """Ring buffer of status updates, newest first.
+
+    Events only reference the files of the cycle that produced them; diff
+    bodies are read from storage when an event is opened, so memory stays
+    bounded by the number of events, not by the size of their diffs.
+    """
+
+    def __init__(self, maxlen=FEED_SIZE, page_size=FEED_PAGE_SIZE):
+        self.events = deque(maxlen=maxlen)
+        self.page_size = page_size
+
+    def add(self, event):
+        self.events.appendleft(event)
+
+    def page_count(self):
+        return max(1, -(-len(self.events) // self.page_size))
+
+    def page(self, number):
+        start = number * self.page_size
+        return [self.events[i] for i in range(start, min(start + self.page_size, len(self.events)))]
 
 class DashboardApp(ctk.CTk):
     def __init__(self):
@@ -28,8 +66,15 @@ class DashboardApp(ctk.CTk):
         # Store last status message for each site
         self.last_status_messages = {}
         
-        # Store HTML changes for translation
-        self.html_changes = {}
+        # Bounded feed of status updates; diffs are loaded from disk when clicked
+        self.feed = EventFeed()
+        self.feed_page = 0
+        
+        # Diffs are read and formatted here, never on the UI thread
+        self.diff_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="diff-render")
+        
+        # Per-phase latency samples for each site
+        self.latency_tracker = LatencyTracker()
         
         # Configure grid layout
         self.grid_columnconfigure(0, weight=1)
@@ -61,6 +106,12 @@ class DashboardApp(ctk.CTk):
                                       command=self.logout, fg_color="#FF5733")
         self.logout_btn.pack(side="left", padx=10)
         
+        # Shared, self-reloading view of monitored_urls.json
+        self.config = get_config()
+        
+        # Output roots already indexed into the run catalog
+        self.indexed_output_roots = set()
+        
         # Start auto-refresh thread
         self.stop_refresh = threading.Event()
         self.refresh_thread = threading.Thread(target=self.auto_refresh, daemon=True)
@@ -111,13 +162,40 @@ class DashboardApp(ctk.CTk):
         # Create scrollable frame for status updates
         self.status_list = ctk.CTkScrollableFrame(self.status_frame, height=150)
         self.status_list.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        
+        # A fixed pool of rows, refilled for the page being shown
+        self.feed_rows = []
+        for _ in range(FEED_PAGE_SIZE):
+            frame = ctk.CTkFrame(self.status_list)
+            time_label = ctk.CTkLabel(frame, text="", anchor="w", width=80)
+            time_label.pack(side="left", padx=5)
+            message_label = ctk.CTkLabel(frame, text="", anchor="w", wraplength=350, justify="left")
+            message_label.pack(side="left", fill="x", expand=True, padx=5)
+            self.feed_rows.append((frame, time_label, message_label))
+        
+        # Pagination controls
+        pager = ctk.CTkFrame(self.status_frame)
+        pager.grid(row=2, column=0, pady=2)
+        self.newer_btn = ctk.CTkButton(pager, text="◀ Plus récents", width=110,
+                                       command=lambda: self.show_feed_page(self.feed_page - 1))
+        self.newer_btn.pack(side="left", padx=5)
+        self.page_label = ctk.CTkLabel(pager, text="Page 1/1", width=90)
+        self.page_label.pack(side="left", padx=5)
+        self.older_btn = ctk.CTkButton(pager, text="Plus anciens ▶", width=110,
+                                       command=lambda: self.show_feed_page(self.feed_page + 1))
+        self.older_btn.pack(side="left", padx=5)
+        self.show_feed_page(0)
     
-    def check_site_status(self, url):
-        """Check if a site is up and get its port with detailed error reporting."""
+    def check_site_status(self, url, slo=None, record=True):
+        """Check if a site is up and get its port with detailed error reporting.
+
+        The check's timings go to the latency tracker when record is true;
+        sites with a running monitor get theirs from its timings.jsonl instead.
+        """
+        slo = slo or dict(DEFAULT_SLO)
         try:
             # Parse the URL
             parsed_url = urlparse(url)
-            hostname = parsed_url.netloc
             scheme = parsed_url.scheme
             
             # Default ports
@@ -126,272 +204,303 @@ class DashboardApp(ctk.CTk):
                 'https': 443
             }
             
-            # Try to establish connection first
-            try:
-                # Check if we can resolve the hostname
-                socket.gethostbyname(hostname)
-            except socket.gaierror:
-                return {
-                    'status': 'Down',
-                    'main_port': 'unknown',
-                    'error': 'DNS Resolution Failed'
-                }
-            
             # Check if site is up with detailed error handling
             try:
-                start_time = time.time()
-                response = requests.get(url, timeout=5)
-                response_time = time.time() - start_time
+                response = shared_timed_get(url, timeout=5)
+                timings = response['timings']
+                if record:
+                    self.latency_tracker.record(url, timings, window_minutes=slo["window_minutes"])
                 
-                # Check response time
-                if response_time > 3:
+                # Check status code
+                if response['status_code'] >= 500:
                     return {
-                        'status': 'Slow',
+                        'status': 'Down',
                         'main_port': str(default_ports.get(scheme, 'unknown')),
-                        'error': f'Response Time: {response_time:.2f}s'
+                        'error': f"Server Error ({response['status_code']})",
+                        'timings': timings
                     }
-                
-                # Check status code
-                if response.status_code >= 500:
+                elif response['status_code'] >= 400:
                     return {
                         'status': 'Down',
                         'main_port': str(default_ports.get(scheme, 'unknown')),
-                        'error': f'Server Error ({response.status_code})'
+                        'error': f"Client Error ({response['status_code']})",
+                        'timings': timings
                     }
-                elif response.status_code >= 400:
+                
+                # Only answers that succeeded are judged on response times, over the SLO window
+                latency_status = self.latency_tracker.classify(url, slo)
+                if latency_status:
+                    p95 = self.latency_tracker.window(url).percentile(95)
                     return {
-                        'status': 'Down',
+                        'status': latency_status,
                         'main_port': str(default_ports.get(scheme, 'unknown')),
-                        'error': f'Client Error ({response.status_code})'
+                        'error': f'p95: {p95:.2f}s (SLO {slo["p95"]:.2f}s)',
+                        'timings': timings
                     }
-                elif response.status_code >= 300:
+                if response['status_code'] >= 300:
                     return {
                         'status': 'Up',
                         'main_port': str(default_ports.get(scheme, 'unknown')),
-                        'error': f'Redirect ({response.status_code})'
+                        'error': f"Redirect ({response['status_code']})",
+                        'timings': timings
                     }
                 
                 # Check if we got actual content
-                if len(response.text.strip()) < 100:
+                if len(response['text'].strip()) < 100:
                     return {
                         'status': 'Warning',
                         'main_port': str(default_ports.get(scheme, 'unknown')),
-                        'error': 'Minimal Content'
+                        'error': 'Minimal Content',
+                        'timings': timings
                     }
                 
                 # Get the actual port being used
-                actual_port = response.url.split(':')[-1].split('/')[0]
-                if not actual_port.isdigit():
-                    actual_port = default_ports.get(scheme, 'unknown')
+                actual_port = urlparse(response['url']).port
+                if actual_port is None:
+                    actual_port = default_ports.get(urlparse(response['url']).scheme, 'unknown')
                 
                 return {
                     'status': 'Up',
                     'main_port': str(actual_port),
-                    'error': None
+                    'error': None,
+                    'timings': timings
                 }
                 
-            except requests.exceptions.Timeout:
+            except socket.gaierror:
+                return {
+                    'status': 'Down',
+                    'main_port': 'unknown',
+                    'error': 'DNS Resolution Failed',
+                    'timings': None
+                }
+            except (socket.timeout, requests.exceptions.Timeout):
                 return {
                     'status': 'Down',
                     'main_port': str(default_ports.get(scheme, 'unknown')),
-                    'error': 'Connection Timeout'
+                    'error': 'Connection Timeout',
+                    'timings': None
                 }
-            except requests.exceptions.ConnectionError:
+            except (ssl.SSLError, requests.exceptions.SSLError):
                 return {
                     'status': 'Down',
                     'main_port': str(default_ports.get(scheme, 'unknown')),
-                    'error': 'Connection Failed'
+                    'error': 'SSL Error',
+                    'timings': None
                 }
-            except requests.exceptions.SSLError:
+            except (OSError, requests.exceptions.RequestException):
                 return {
                     'status': 'Down',
                     'main_port': str(default_ports.get(scheme, 'unknown')),
-                    'error': 'SSL Error'
+                    'error': 'Connection Failed',
+                    'timings': None
                 }
             except Exception as e:
                 return {
                     'status': 'Down',
                     'main_port': str(default_ports.get(scheme, 'unknown')),
-                    'error': f'Request Error: {str(e)}'
+                    'error': f'Request Error: {str(e)}',
+                    'timings': None
                 }
                 
         except Exception as e:
             return {
                 'status': 'Down',
                 'main_port': 'unknown',
-                'error': f'General Error: {str(e)}'
+                'error': f'General Error: {str(e)}',
+                'timings': None
             }
 
-    def translate_html_to_text(self, html_content):
-        """Convert HTML to plain English text."""
-        try:
-            # Create HTML to text converter
-            h = html2text.HTML2Text()
-            h.ignore_links = False
-            h.ignore_images = False
-            h.ignore_tables = False
-            h.body_width = 0  # No wrapping
-            
-            # Convert HTML to text
-            text = h.handle(html_content)
-            
-            # Clean up the text
-            text = text.replace('\\', '')  # Remove escape characters
-            text = text.replace('*', '')   # Remove markdown emphasis
-            text = text.strip()            # Remove extra whitespace
-            
-            return text
-        except Exception as e:
-            return f"Error translating HTML: {str(e)}"
-
-    def format_diff_content(self, diff_content):
-        """Format the diff content to make it more readable."""
-        try:
-            # Split the content into lines
-            lines = diff_content.split('\n')
-            formatted_lines = []
-            
-            for line in lines:
-                if line.startswith('+'):
-                    # Added content (green)
-                    formatted_lines.append(f"Added: {line[1:].strip()}")
-                elif line.startswith('-'):
-                    # Removed content (red)
-                    formatted_lines.append(f"Removed: {line[1:].strip()}")
-                elif line.startswith('@'):
-                    # Section header
-                    formatted_lines.append(f"\n--- Change Location ---")
-                elif line.startswith(' '):
-                    # Unchanged content
-                    formatted_lines.append(f"Context: {line.strip()}")
-                else:
-                    # Other content
-                    formatted_lines.append(line)
-            
-            # Join the lines with proper spacing
-            formatted_content = '\n'.join(formatted_lines)
-            
-            # Add a summary at the top
-            added_count = sum(1 for line in lines if line.startswith('+'))
-            removed_count = sum(1 for line in lines if line.startswith('-'))
-            summary = f"""Summary of Changes:
-- {added_count} lines added
-- {removed_count} lines removed
-
-Detailed Changes:
-----------------
-"""
-            return summary + formatted_content
-            
-        except Exception as e:
-            print(f"Error formatting diff content: {e}")
-            return diff_content
+    def show_translation_window(self, url, changes=None, diff_path=None):
+        """Show the changes of one cycle.
 
-    def show_translation_window(self, html_content, url):
-        """Show a window with the translated diff content in a readable way."""
-        print(f"Showing translation window for URL: {url}")
+        The window opens at once. The changed elements are shown when the
+        monitor located them; otherwise the diff file is rendered on a worker
+        thread: summary counts first, then pages of hunks as the user
+        scrolls towards the end. Rendered diffs are cached per file.
+        """
+        logger.debug(f"Showing translation window for URL: {url}")
         try:
             # Create a new window
             translation_window = ctk.CTkToplevel(self)
             translation_window.title(f"Changes Detected - {url}")
             translation_window.geometry("1000x700")
             
-            # Create a scrollable frame
-            scroll_frame = ctk.CTkScrollableFrame(translation_window)
-            scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
-            
             # Add title
-            title_label = ctk.CTkLabel(scroll_frame, text="Changes Detected", font=("Arial", 16, "bold"))
+            title_label = ctk.CTkLabel(translation_window, text="Changes Detected", font=("Arial", 16, "bold"))
             title_label.pack(pady=5)
             
             # Add URL
-            url_label = ctk.CTkLabel(scroll_frame, text=f"URL: {url}", font=("Arial", 12))
+            url_label = ctk.CTkLabel(translation_window, text=f"URL: {url}", font=("Arial", 12))
             url_label.pack(pady=5)
             
-            # Format the diff content
-            formatted_content = self.format_diff_content(html_content)
-            
             # Create a text widget for better text display (no color coding)
-            text_widget = ctk.CTkTextbox(scroll_frame, width=950, height=500)
-            text_widget.pack(pady=5, padx=5, fill="both", expand=True)
-            text_widget.insert("1.0", formatted_content)
-            text_widget.configure(state="disabled")  # Make read-only
+            text_widget = ctk.CTkTextbox(translation_window, width=950, height=500)
+            text_widget.pack(pady=5, padx=10, fill="both", expand=True)
             
             # Add explanation
-            explanation_frame = ctk.CTkFrame(scroll_frame)
-            explanation_frame.pack(fill="x", pady=10, padx=5)
-            
-            explanation_text = """
-How to read the changes:
+            explanation_text = """How to read the changes:
+- '[Ajouté]', '[Supprimé]', '[Modifié]' lines give the CSS selector of the changed element,
+  followed by its text before ('Avant:') and after ('Après:') the change
 - Lines starting with 'Added:' show new content that was added
 - Lines starting with 'Removed:' show content that was removed
 - '--- Change Location ---' shows where in the page the changes occurred
-- 'Context:' lines show the surrounding context
-"""
-            explanation_label = ctk.CTkLabel(explanation_frame, text=explanation_text,
+- 'Context:' lines show the surrounding context"""
+            explanation_label = ctk.CTkLabel(translation_window, text=explanation_text,
                                           justify="left", wraplength=900)
             explanation_label.pack(pady=5, padx=5)
             
-            # Add close button
-            close_btn = ctk.CTkButton(translation_window, text="Close", 
-                                    command=translation_window.destroy)
-            close_btn.pack(pady=10)
-            
-            print("Translation window created successfully")
+            button_frame = ctk.CTkFrame(translation_window)
+            button_frame.pack(pady=10)
+            more_btn = ctk.CTkButton(button_frame, text="Charger plus", state="disabled")
+            more_btn.pack(side="left", padx=5)
+            close_btn = ctk.CTkButton(button_frame, text="Close", command=translation_window.destroy)
+            close_btn.pack(side="left", padx=5)
+            if diff_path:
+                # An open mapping would keep retention from deleting the run on Windows
+                translation_window.bind("<Destroy>", lambda event: DIFFS.release(diff_path)
+                                        if event.widget is translation_window else None)
+            
+            def append(text):
+                if text_widget.winfo_exists():
+                    text_widget.configure(state="normal")
+                    text_widget.insert("end", text)
+                    text_widget.configure(state="disabled")
+            
+            if changes:
+                append(format_changes(changes))
+                if diff_path:
+                    more_btn.configure(text="Diff ligne à ligne", state="normal",
+                                       command=lambda: (more_btn.configure(state="disabled"),
+                                                        self.stream_diff(diff_path, text_widget, more_btn, append)))
+            elif diff_path:
+                self.stream_diff(diff_path, text_widget, more_btn, append)
             
         except Exception as e:
-            print(f"Error in show_translation_window: {str(e)}")
+            logger.error(f"Error in show_translation_window: {e}", exc_info=True)
             messagebox.showerror("Error", f"Failed to show changes: {str(e)}")
 
-    def add_status_update(self, message, html_content=None, url=None):
-        """Add a status update to the status list with clickable translation."""
-        print(f"Adding status update: {message}")  # Debug print
-        print(f"HTML content available: {html_content is not None}")  # Debug print
-        
-        frame = ctk.CTkFrame(self.status_list)
-        frame.pack(fill="x", pady=2)
-        
-        # Add timestamp
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        ctk.CTkLabel(frame, text=f"[{timestamp}]", anchor="w", width=80).pack(side="left", padx=5)
-        
-        # Create a clickable label for the message
-        message_label = ctk.CTkLabel(frame, text=message, anchor="w", 
-                                   wraplength=350, justify="left",
-                                   cursor="hand2")  # Show hand cursor on hover
-        
-        # Store HTML content if provided
-        if html_content and url:
-            print(f"Storing HTML content for message: {message[:50]}...")  # Debug print
-            self.html_changes[message] = (html_content, url)
-            message_label.configure(cursor="hand2")
-            
-            # Create a function to handle the click event
-            def on_click(event, msg=message):
-                print(f"Click detected on message: {msg[:50]}...")  # Debug print
-                if msg in self.html_changes:
-                    print("Found HTML content in storage")  # Debug print
-                    html, site_url = self.html_changes[msg]
-                    self.show_translation_window(html, site_url)
-                else:
-                    print("No HTML content found in storage")  # Debug print
-            
-            # Bind the click event
-            message_label.bind("<Button-1>", on_click)
-            print("Click event bound to label")  # Debug print
+    def stream_diff(self, diff_path, text_widget, more_btn, append):
+        """Render diff_path off the UI thread and append it page by page."""
+        state = {"diff": None, "next": 0, "loading": True}
+        append("\n\nChargement du diff...\n")
+        
+        def load_next():
+            if state["loading"] or state["diff"] is None or state["next"] >= state["diff"].page_count:
+                return
+            state["loading"] = True
+            more_btn.configure(state="disabled")
+            number = state["next"]
+            self.diff_pool.submit(state["diff"].page, number).add_done_callback(
+                lambda future: self.after(0, on_page, number, future))
+        
+        def on_page(number, future):
+            state["loading"] = False
+            try:
+                append(future.result())
+            except Exception as e:
+                append(f"\nErreur de lecture du diff: {e}\n")
+                return
+            state["next"] = number + 1
+            remaining = state["diff"].page_count - state["next"]
+            more_btn.configure(text=f"Charger plus ({remaining} pages)" if remaining else "Tout est chargé",
+                               state="normal" if remaining else "disabled", command=load_next)
+        
+        def on_loaded(future):
+            state["loading"] = False
+            try:
+                state["diff"] = future.result()
+            except Exception as e:
+                append(f"Erreur de lecture du diff: {e}\n")
+                return
+            append(state["diff"].summary())
+            load_next()
+            watch_scroll()
+        
+        def watch_scroll():
+            # Load the next page when the user nears the end of what is shown
+            if not text_widget.winfo_exists():
+                return
+            if text_widget.yview()[1] > 0.9:
+                load_next()
+            self.after(250, watch_scroll)
         
-        message_label.pack(side="left", fill="x", expand=True, padx=5)
+        self.diff_pool.submit(DIFFS.get, diff_path).add_done_callback(
+            lambda future: self.after(0, on_loaded, future))
+
+    def add_status_update(self, message, url=None, run_dir=None, manifest=None):
+        """Add a status update to the feed; its diff is read from run_dir only when clicked."""
+        manifest = manifest or {}
+        self.feed.add({
+            "time": datetime.now().strftime("%H:%M:%S"),
+            "message": message,
+            "url": url,
+            "run_dir": run_dir,
+            "diff": manifest.get("diff"),
+            "changes": manifest.get("changes"),
+            "severity": manifest.get("severity")
+        })
+        # Stay on the page being read; the newest page follows new events
+        if self.feed_page == 0:
+            self.show_feed_page(0)
+        else:
+            self.update_pager()
+
+    def update_pager(self):
+        pages = self.feed.page_count()
+        self.page_label.configure(text=f"Page {self.feed_page + 1}/{pages}")
+        self.newer_btn.configure(state="normal" if self.feed_page > 0 else "disabled")
+        self.older_btn.configure(state="normal" if self.feed_page < pages - 1 else "disabled")
+
+    def show_feed_page(self, number):
+        """Fill the row pool with one page of the feed."""
+        self.feed_page = max(0, min(number, self.feed.page_count() - 1))
+        events = self.feed.page(self.feed_page)
+        for index, (frame, time_label, message_label) in enumerate(self.feed_rows):
+            if index >= len(events):
+                frame.pack_forget()
+                continue
+            event = events[index]
+            time_label.configure(text=f"[{event['time']}]")
+            clickable = bool(event["run_dir"] and (event["diff"] or event["changes"]))
+            message_label.configure(text=event["message"], cursor="hand2" if clickable else "",
+                                    text_color="#FF4500" if event["severity"] == "major" else
+                                    ctk.ThemeManager.theme["CTkLabel"]["text_color"])
+            message_label.unbind("<Button-1>")
+            if clickable:
+                message_label.bind("<Button-1>", lambda _event, e=event: self.open_event(e))
+            frame.pack(fill="x", pady=2)
+        self.update_pager()
+
+    def open_event(self, event):
+        """Show an event's changed elements (or diff) from its run directory."""
+        changes = None
+        diff_path = os.path.join(event["run_dir"], event["diff"]) if event["diff"] else None
+        try:
+            if event["changes"]:
+                with open(os.path.join(event["run_dir"], event["changes"]), 'r', encoding='utf-8') as f:
+                    changes = json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading changes file for {event['url']}: {e}")
+        if changes is None and diff_path is None:
+            messagebox.showerror("Erreur", "Impossible de lire les changements")
+            return
+        self.show_translation_window(event["url"], changes, diff_path)
 
     def get_monitored_sites(self):
         """Get the list of monitored sites with their status."""
-        from task1_review import tasks_monitored_urls
         monitored_sites = []
+        sites = self.config.sites()
         
         with self.file_lock:
-            for site in tasks_monitored_urls:
+            self.index_output_roots(sites)
+            
+            # One catalog query for every site instead of scanning output directories
+            runs = catalog.latest_runs()
+            live = catalog.live_monitors()
+            for site in sites:
                 url = site["url"]
                 danger_level = site["danger_level"]
-                base_dir = os.path.join(os.getcwd(), "WebMonitor_Output")
+                slo = get_slo(site)
                 
                 # Default values
                 status = "Up"
@@ -399,13 +508,15 @@ How to read the changes:
                 error = None
                 last_modified = time.time()
                 is_monitoring = False
+                heartbeat = None
                 
                 try:
                     # Check site status every 60 seconds
                     current_time = time.time()
                     if not hasattr(self, 'last_status_check') or url not in self.last_status_check or \
                        current_time - self.last_status_check[url] >= 60:
-                        site_status = self.check_site_status(url)
+                        # A running monitor already records this site's timings: count each sample once
+                        site_status = self.check_site_status(url, slo, record=url not in live)
                         status = site_status['status']
                         main_port = site_status['main_port']
                         error = site_status.get('error')
@@ -415,53 +526,32 @@ How to read the changes:
                             self.last_status_check = {}
                         self.last_status_check[url] = current_time
                     
-                    # Find the most recent monitoring directory for this site
-                    site_dirs = [d for d in os.listdir(base_dir) 
-                               if d.startswith(url.replace('://', '_').replace('/', '_'))]
-                    if site_dirs:
-                        latest_dir = max(site_dirs)
-                        output_dir = os.path.join(base_dir, latest_dir)
-                        
-                        # Check if monitoring is active
-                        for file in os.listdir(output_dir):
-                            file_path = os.path.join(output_dir, file)
-                            if os.path.getmtime(file_path) > current_time - 60:
-                                is_monitoring = True
-                                break
+                    # Monitors publish heartbeats that expire on their own once they stop
+                    heartbeat = live.get(url)
+                    is_monitoring = heartbeat is not None
+                    
+                    # Look up the most recent run of this site in the catalog
+                    run = runs.get(url)
+                    if run:
+                        output_dir = run["run_dir"]
                         
-                        # Check for status file
-                        status_file = os.path.join(output_dir, "status.txt")
+                        # Pick up the phase timings recorded by the monitor
+                        self.latency_tracker.ingest_file(url, os.path.join(output_dir, "timings.jsonl"),
+                                                        slo["window_minutes"])
                         
-                        if os.path.exists(status_file):
-                            if os.path.getmtime(status_file) > current_time - 60:
-                                with open(status_file, 'r', encoding='utf-8') as f:
-                                    status_message = f.read()
-                                    
-                                    # Check for changes
-                                    if "changements détectés" in status_message.lower():
-                                        current_message = f"{status_message} - {url} (Niveau: {danger_level})"
-                                        
-                                        # Read diff files if available
-                                        html_content = None
-                                        diff_files = [f for f in os.listdir(output_dir) if f.startswith("diff_") and f.endswith(".txt")]
-                                        if diff_files:
-                                            try:
-                                                # Get the most recent diff file
-                                                latest_diff = max(diff_files)
-                                                diff_file_path = os.path.join(output_dir, latest_diff)
-                                                with open(diff_file_path, 'r', encoding='utf-8') as cf:
-                                                    html_content = cf.read()
-                                                    print(f"Successfully read diff content for {url} from {latest_diff}")
-                                                    print(f"Diff content length: {len(html_content)}")
-                                            except Exception as e:
-                                                print(f"Error reading diff file for {url}: {e}")
-                                        
-                                        if url not in self.last_status_messages or self.last_status_messages[url] != current_message:
-                                            print(f"Adding new status update for {url}")
-                                            self.add_status_update(current_message, html_content, url)
-                                            self.last_status_messages[url] = current_message
+                        # The catalog holds the manifest of the last committed cycle, so
+                        # the diff it names is complete
+                        manifest = run["manifest"]
+                        if manifest and manifest["time"] > current_time - 60 and manifest["has_changes"]:
+                            status_message = manifest["status_message"]
+                            current_message = f"{status_message} - {url} (Niveau: {danger_level})"
+                            
+                            if url not in self.last_status_messages or self.last_status_messages[url] != current_message:
+                                logger.debug(f"Adding new status update for {url}")
+                                self.add_status_update(current_message, url, output_dir, manifest)
+                                self.last_status_messages[url] = current_message
                 except Exception as e:
-                    print(f"Error checking site {url}: {e}")
+                    logger.warning(f"Error checking site {url}: {e}")
                     continue
                 
                 monitored_sites.append({
@@ -470,12 +560,30 @@ How to read the changes:
                     "danger_level": danger_level,
                     "last_updated": last_modified,
                     "is_monitoring": is_monitoring,
+                    "next_check": heartbeat["next_check"] if heartbeat else None,
                     "main_port": main_port,
-                    "error": error
+                    "error": error,
+                    "latency": self.latency_tracker.percentiles(url),
+                    "last_timings": self.latency_tracker.last(url)
                 })
         
         return monitored_sites
     
+    def index_output_roots(self, sites):
+        """Index runs created before the catalog existed, once per configured output directory."""
+        roots = {}
+        for site in sites:
+            if site.get("output_dir"):
+                roots.setdefault(site["output_dir"], []).append(site["url"])
+        for output_root, urls in roots.items():
+            if output_root in self.indexed_output_roots:
+                continue
+            try:
+                catalog.index_existing_runs(output_root, urls)
+                self.indexed_output_roots.add(output_root)
+            except Exception as e:
+                logger.warning(f"Error indexing runs in {output_root}: {e}")
+    
     def get_danger_color(self, level):
         """Get the color for a danger level."""
         return {
@@ -535,6 +643,7 @@ How to read the changes:
                 'Up': "#00FF00",      # Green
                 'Down': "#FF0000",    # Red
                 'Slow': "#FFA500",    # Orange
+                'Degraded': "#FFD700", # Gold
                 'Warning': "#FFFF00"  # Yellow
             }
             status_color = status_colors.get(current_status, "#808080")
@@ -545,9 +654,20 @@ How to read the changes:
                                       text_color=status_color, width=200)
             status_label.pack(side="right", padx=5)
             
+            # Latency percentiles with the phase breakdown of the last check
+            latency = site.get("latency")
+            if latency:
+                latency_text = "p50/p95/p99: " + "/".join(f"{latency[p] * 1000:.0f}" for p in (50, 95, 99)) + " ms"
+                if site.get("last_timings"):
+                    latency_text += "\n" + format_timings(site["last_timings"])
+                latency_label = ctk.CTkLabel(frame, text=latency_text, justify="left", width=200)
+                latency_label.pack(side="right", padx=5)
+            
             # Add monitoring status indicator
             monitor_color = "#00FF00" if is_monitoring else "#808080"
             monitor_text = "En cours" if is_monitoring else "Arrêté"
+            if is_monitoring and site.get("next_check"):
+                monitor_text += f"\n(prochain: {datetime.fromtimestamp(site['next_check']).strftime('%H:%M:%S')})"
             monitor_label = ctk.CTkLabel(frame, text=monitor_text, 
                                        text_color=monitor_color, width=80)
             monitor_label.pack(side="right", padx=5)
@@ -581,6 +701,7 @@ How to read the changes:
 
 def run_dashboard():
     """Run the dashboard application."""
+    setup_logging()
     app = DashboardApp()
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     app.mainloop()
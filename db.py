@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Compiled statements kept per connection; every query uses ? parameters so they are reused
+STATEMENT_CACHE_SIZE = 256
+
+class Database:
+    """One SQLite file shared by the GUI windows and the monitor threads.
+
+    Each thread gets its own connection, opened on first use and kept for
+    the life of the thread, in WAL mode so readers never wait for the
+    writer. The schema script runs once per connection and must only use
+    CREATE ... IF NOT EXISTS statements.
+    """
+
+    def __init__(self, path, schema=""):
+        self.path = path
+        self.schema = schema
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []
+        self.generation = 0
+
+    def connection(self):
+        """Return this thread's connection, creating it (and the schema) on first use."""
+        conn = getattr(self.local, "conn", None)
+        if conn is not None and self.local.generation == self.generation:
+            return conn
+        conn = sqlite3.connect(self.path, timeout=10, cached_statements=STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        if self.schema:
+            conn.executescript(self.schema)
+            conn.commit()
+        with self.lock:
+            # Close the connections of threads that ended, or monitors restarting would leak them
+            finished = [(thread, old) for thread, old in self.connections if not thread.is_alive()]
+            self.connections = [(thread, old) for thread, old in self.connections if thread.is_alive()]
+            self.connections.append((threading.current_thread(), conn))
+            self.local.generation = self.generation
+        for _, old in finished:
+            old.close()
+        self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of statements as one transaction, rolled back if it raises."""
+        conn = self.connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def execute(self, sql, params=()):
+        """Run one write statement and commit it; returns the cursor."""
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def query_one(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchone()
+
+    def query_all(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    def checkpoint(self):
+        """Copy the write-ahead log into the database and truncate it, so it does not keep growing."""
+        return self.connection().execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+
+    def close_all(self):
+        """Close every thread's connection; threads reconnect on their next query."""
+        with self.lock:
+            connections, self.connections = self.connections, []
+            self.generation += 1
+        for _, conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not close connection to {self.path}: {e}")
+
+    def delete(self):
+        """Close all connections and remove the database file with its WAL files."""
+        self.close_all()
+        for path in (self.path, self.path + "-wal", self.path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
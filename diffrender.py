@@ -0,0 +1,101 @@
+import os
+import bisect
+import threading
+from collections import OrderedDict
+
+from mmap_reader import MAPPED_FILES
+
+# Hunks formatted per page of the diff window
+HUNKS_PER_PAGE = 20
+
+def format_line(line):
+    """Readable form of one unified diff line, as shown in the diff window."""
+    if line.startswith('+'):
+        return f"Added: {line[1:].strip()}"
+    if line.startswith('-'):
+        return f"Removed: {line[1:].strip()}"
+    if line.startswith('@'):
+        return "\n--- Change Location ---"
+    if line.startswith(' '):
+        return f"Context: {line.strip()}"
+    return line
+
+class RenderedDiff:
+    """A diff file split into hunks, with counts up front and pages formatted on demand.
+
+    The file is memory-mapped (see mmap_reader): counts and the byte
+    offsets of hunks are found by searching the mapping, and only the
+    pages actually shown are decoded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = MAPPED_FILES.get(path)
+        find = self.file.find_line_starts
+        self.hunk_starts = find(b"@@")
+        # Only lines after the first hunk header count: the ---/+++ file header comes before it,
+        # while content lines may start with "--" or "++" themselves ("-->" removed is "--->")
+        first_hunk = self.hunk_starts[0] if self.hunk_starts else self.file.size
+        added, removed = find(b"+"), find(b"-")
+        self.added = len(added) - bisect.bisect_left(added, first_hunk)
+        self.removed = len(removed) - bisect.bisect_left(removed, first_hunk)
+        if not self.hunk_starts:
+            self.hunk_starts = [0]  # Not a unified diff ("No changes detected.", errors...)
+        self.pages = {}
+        self.lock = threading.Lock()
+
+    @property
+    def page_count(self):
+        return -(-len(self.hunk_starts) // HUNKS_PER_PAGE)
+
+    def summary(self):
+        return (f"Summary of Changes:\n- {self.added} lines added\n- {self.removed} lines removed\n"
+                f"- {len(self.hunk_starts)} change locations\n\nDetailed Changes:\n----------------\n")
+
+    def page(self, number):
+        """Formatted text of the number-th page of hunks, cached once built."""
+        with self.lock:
+            text = self.pages.get(number)
+            if text is None:
+                first = number * HUNKS_PER_PAGE
+                last = first + HUNKS_PER_PAGE
+                start = self.hunk_starts[first]
+                end = self.hunk_starts[last] if last < len(self.hunk_starts) else self.file.size
+                lines = self.file.text(start, end)
+                if lines.endswith('\n'):
+                    lines = lines[:-1]
+                text = '\n'.join(format_line(line) for line in lines.split('\n')) + '\n'
+                self.pages[number] = text
+            return text
+
+class DiffCache:
+    """Rendered diffs by file, reused while the file is unchanged."""
+
+    def __init__(self, size=16):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            rendered = self.entries.get(key)
+            if rendered is not None:
+                self.entries.move_to_end(key)
+                return rendered
+        rendered = RenderedDiff(path)
+        evicted = []
+        with self.lock:
+            self.entries[key] = rendered
+            while len(self.entries) > self.size:
+                evicted.append(self.entries.popitem(last=False)[1])
+        for old in evicted:
+            old.file.close()
+        return rendered
+
+    def release(self, path):
+        """Unmap path once nobody reads it, so retention can delete it; pages already built stay cached."""
+        MAPPED_FILES.release(path)
+
+DIFFS = DiffCache()
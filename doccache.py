@@ -0,0 +1,152 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from bs4 import BeautifulSoup
+
+from metrics import Counter, Gauge
+from urlutils import normalize_url
+
+DOCUMENT_CACHE = Counter("webmonitor_document_cache_total", "Document cache lookups, by result.", ("result",))
+DOCUMENT_CACHE_BYTES = Gauge("webmonitor_document_cache_bytes", "Approximate size of the cached documents.")
+
+def content_hash(html):
+    return hashlib.blake2b(html.encode('utf-8'), digest_size=16).hexdigest()
+
+class Document:
+    """A fetched page and the forms derived from it, each computed once."""
+
+    def __init__(self, url, html, digest):
+        self.url = url
+        self.html = html
+        self.digest = digest
+        self.fetched_at = time.time()
+        self.lock = threading.Lock()
+        self._tags = None
+        self._derived = {}
+
+    @property
+    def size(self):
+        # Rough: characters of every text form plus ~100 bytes per indexed tag
+        return (len(self.html) + sum(len(text) for text in self._derived.values())
+                + (len(self._tags) * 100 if self._tags else 0))
+
+    def tags(self):
+        """[(index, name, attrs)] in modify_html's numbering."""
+        with self.lock:
+            if self._tags is None:
+                soup = BeautifulSoup(self.html, 'html.parser')
+                self._tags = [(index, tag.name, dict(tag.attrs)) for index, tag in enumerate(soup.find_all())]
+            return self._tags
+
+    def derive(self, key, compute):
+        """Text computed from the page by compute(html), computed once per key."""
+        with self.lock:
+            text = self._derived.get(key)
+            if text is None:
+                text = compute(self.html)
+                self._derived[key] = text
+            return text
+
+    def modified(self, excluded_indices, modify):
+        """modify(html, excluded_indices), computed once per set of excluded tags."""
+        return self.derive(("modified", tuple(sorted(excluded_indices))),
+                           lambda html: modify(html, excluded_indices))
+
+class DocumentCache:
+    """LRU cache of fetched documents keyed by normalized URL and content hash.
+
+    Entries older than ttl seconds are dropped on access, and the least
+    recently used ones are evicted once the cached text exceeds max_bytes.
+    An unchanged page therefore maps to the same Document and is not parsed
+    again, and a page loaded to pick tags can serve as the baseline when
+    monitoring starts right after.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.latest = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, document, now):
+        return now - document.fetched_at > self.ttl
+
+    def _drop(self, key):
+        document = self.entries.pop(key)
+        if self.latest.get(key[0]) == key:
+            del self.latest[key[0]]
+        return document
+
+    def _evict(self, now):
+        for key in [key for key, document in self.entries.items() if self._expired(document, now)]:
+            self._drop(key)
+        total = sum(document.size for document in self.entries.values())
+        while total > self.max_bytes and len(self.entries) > 1:
+            key = next(iter(self.entries))
+            total -= self._drop(key).size
+            self.evictions += 1
+        DOCUMENT_CACHE_BYTES.set(total)
+
+    def put(self, url, html):
+        """Return the cached Document for this content of url, adding it if needed."""
+        key = (normalize_url(url), content_hash(html))
+        now = time.time()
+        with self.lock:
+            document = self.entries.get(key)
+            if document is not None and not self._expired(document, now):
+                self.hits += 1
+                DOCUMENT_CACHE.inc(result="hit")
+                document.fetched_at = now
+                self.entries.move_to_end(key)
+            else:
+                self.misses += 1
+                DOCUMENT_CACHE.inc(result="miss")
+                document = Document(url, html, key[1])
+                self.entries[key] = document
+            self.latest[key[0]] = key
+            self._evict(now)
+            return document
+
+    def forget(self, url):
+        """Drop every cached document of url, so the next use parses a fresh fetch."""
+        normalized = normalize_url(url)
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == normalized]:
+                self._drop(key)
+
+    def recent(self, url, max_age=None):
+        """Return the last document fetched for url if younger than max_age (default: ttl)."""
+        max_age = self.ttl if max_age is None else max_age
+        with self.lock:
+            key = self.latest.get(normalize_url(url))
+            document = self.entries.get(key) if key else None
+            if document is None or time.time() - document.fetched_at > max_age:
+                self.misses += 1
+                DOCUMENT_CACHE.inc(result="miss")
+                return None
+            self.hits += 1
+            DOCUMENT_CACHE.inc(result="hit")
+            self.entries.move_to_end(key)
+            return document
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": sum(document.size for document in self.entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+DOCUMENTS = DocumentCache(max_bytes=int(float(os.environ.get("WEBMONITOR_DOC_CACHE_MB", "64")) * 1024 * 1024),
+                          ttl=float(os.environ.get("WEBMONITOR_DOC_CACHE_TTL", "300")))
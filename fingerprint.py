@@ -0,0 +1,94 @@
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+SIMHASH_BITS = 64
+SHINGLE_WORDS = 3
+
+# Minimum change magnitude (0-1) that counts as a change, and from which it is major,
+# per danger level. Every textual change is reported by default: SimHash misses small
+# edits on large pages, so suppressing changes is left to sites that set "change" themselves.
+DEFAULT_CHANGE_THRESHOLDS = {
+    "Critical": {"change": 0.0, "major": 0.15},
+    "High": {"change": 0.0, "major": 0.25},
+    "Medium": {"change": 0.0, "major": 0.35},
+    "Low": {"change": 0.0, "major": 0.5}
+}
+
+_TAGS = re.compile(r"<[^>]*>")
+_WORDS = re.compile(r"\w+")
+
+# Lane width of the column counters below: up to 2**20 shingles per page
+_LANE = 20
+_LANE_MASK = (1 << _LANE) - 1
+# For every byte value, its 8 bits spread one per lane
+_SPREAD = [sum(((byte >> bit) & 1) << (bit * _LANE) for bit in range(8)) for byte in range(256)]
+
+def get_change_thresholds(site):
+    """Return the change thresholds for a monitored site, filling in defaults from its danger level."""
+    thresholds = dict(DEFAULT_CHANGE_THRESHOLDS.get(site.get("danger_level"), DEFAULT_CHANGE_THRESHOLDS["Low"]))
+    thresholds.update(site.get("change_thresholds") or {})
+    return thresholds
+
+def simhash(text):
+    """64-bit SimHash over 3-word shingles of the text content of an HTML snapshot.
+
+    Instead of looping over 64 bits per shingle, every shingle hash is
+    spread into 64 counter lanes of one big integer, so the per-bit counts
+    are accumulated with one addition per shingle.
+    """
+    words = _WORDS.findall(_TAGS.sub(" ", text).lower())
+    if len(words) < SHINGLE_WORDS:
+        words = words or [""]
+        shingles = [" ".join(words)]
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    columns = 0
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest()
+        for position, byte in enumerate(digest):
+            columns += _SPREAD[byte] << (position * 8 * _LANE)
+    half = len(shingles) / 2
+    value = 0
+    for bit in range(SIMHASH_BITS):
+        if (columns >> (bit * _LANE)) & _LANE_MASK > half:
+            value |= 1 << bit
+    return value
+
+def change_magnitude(before, after):
+    """0 for near-identical fingerprints, 1 for unrelated pages (32+ differing bits)."""
+    return min(1.0, bin(before ^ after).count("1") / (SIMHASH_BITS / 2))
+
+def classify_change(magnitude, thresholds):
+    """'major', 'change' or 'minor' (below the reporting threshold)."""
+    if magnitude >= thresholds["major"]:
+        return "major"
+    if magnitude >= thresholds["change"]:
+        return "change"
+    return "minor"
+
+class FingerprintCache:
+    """Fingerprints of recent snapshots, so a baseline is not fingerprinted again every cycle."""
+
+    def __init__(self, size=256):
+        self.size = size
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, text):
+        # str hashes are cached on the object, and baselines are the same object across cycles
+        key = (len(text), hash(text))
+        with self.lock:
+            value = self.values.get(key)
+            if value is not None:
+                self.values.move_to_end(key)
+                return value
+        value = simhash(text)
+        with self.lock:
+            self.values[key] = value
+            while len(self.values) > self.size:
+                self.values.popitem(last=False)
+        return value
+
+FINGERPRINTS = FingerprintCache()
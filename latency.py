@@ -0,0 +1,353 @@
+import socket
+import time
+import json
+import os
+import threading
+import math
+from array import array
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+
+from singleflight import SingleFlight
+from urlutils import normalize_url
+
+# Phases recorded for every request, in the order they happen
+PHASES = ("dns", "connect", "tls", "ttfb", "download")
+
+def empty_timings():
+    """Return a timings dict with every phase set to zero."""
+    timings = {phase: 0.0 for phase in PHASES}
+    timings["total"] = 0.0
+    return timings
+
+# Timings of the timed_get running in this thread; its connections add their setup phases to it
+_current = threading.local()
+
+def _add_phase(phase, seconds):
+    timings = getattr(_current, "timings", None)
+    if timings is not None:
+        timings[phase] += seconds
+
+class _TimedConnectionMixin:
+    """Time DNS resolution and TCP connect of the connection that actually makes the request.
+
+    The host is resolved here, then urllib3 connects to each address in
+    turn, so it keeps its own error handling and socket options.
+    """
+    setup_seconds = 0.0
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror:
+            addresses = []  # Let urllib3 raise its NameResolutionError
+        dns = time.perf_counter() - start
+        _add_phase("dns", dns)
+        if not addresses:
+            return super()._new_conn()
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            for index, address in enumerate(addresses):
+                self._dns_host = address[4][0]
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError:
+                    if index == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+            connect = time.perf_counter() - start
+            _add_phase("connect", connect)
+            self.setup_seconds = dns + connect
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        # Through a proxy this also covers the CONNECT tunnel
+        _add_phase("tls", time.perf_counter() - start - self.setup_seconds)
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+_TIMED_POOLS = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+class _TimedAdapter(HTTPAdapter):
+    """requests adapter whose connections report their setup phases to timed_get."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _TIMED_POOLS
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = _TIMED_POOLS
+        return manager
+
+def timed_get(url, timeout=5, max_redirects=5):
+    """Fetch a URL with requests, following redirects, and return the response with per-phase timings.
+
+    dns, connect and tls are measured on the connections that make the
+    request (summed over redirect hops that open one; through a proxy they
+    are those of the proxy connection). ttfb is the rest of the time until
+    the final headers arrived, and download the time reading the body.
+    """
+    timings = empty_timings()
+    _current.timings = timings
+    try:
+        with requests.Session() as session:
+            adapter = _TimedAdapter()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.max_redirects = max_redirects
+            start = time.perf_counter()
+            response = session.get(url, timeout=timeout, stream=True, headers={"User-Agent": "WebSiteWatcher/1.0"})
+            headers_at = time.perf_counter()
+            try:
+                text = response.text
+            finally:
+                response.close()
+            timings["download"] = time.perf_counter() - headers_at
+    finally:
+        _current.timings = None
+    timings["ttfb"] = headers_at - start - timings["dns"] - timings["connect"] - timings["tls"]
+    timings["total"] = sum(timings[phase] for phase in PHASES)
+    return {
+        'status_code': response.status_code,
+        'url': response.url,
+        'text': text,
+        'timings': timings
+    }
+
+_probes = SingleFlight("probe")
+
+def shared_timed_get(url, timeout=5):
+    """timed_get, sharing one request between concurrent probes of the same normalized URL.
+
+    The monitor and the dashboard both probe every configured site; within
+    the single-flight freshness window they get the same response back.
+    Callers must not modify it.
+    """
+    return _probes.do(normalize_url(url), timed_get, url, timeout)
+
+def format_timings(timings):
+    """Format a timings dict as a short human-readable breakdown in milliseconds."""
+    labels = {
+        "dns": "DNS",
+        "connect": "Connexion",
+        "tls": "TLS",
+        "ttfb": "TTFB",
+        "download": "Transfert"
+    }
+    return " | ".join(f"{labels[phase]} {timings.get(phase, 0.0) * 1000:.0f}" for phase in PHASES) + " ms"
+
+def timings_line(iteration, status, timings):
+    """Serialize one check's timings as a timings.jsonl line."""
+    record = {"time": time.time(), "iteration": iteration, "status": status}
+    record.update(timings)
+    return json.dumps(record) + "\n"
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(p / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+# Histogram bucket layout: log-scaled buckets from 1 ms to ~2 minutes,
+# each about 10% wider than the previous one (~5% worst-case error)
+HISTOGRAM_MIN = 0.001
+HISTOGRAM_GROWTH = 1.1
+HISTOGRAM_BUCKETS = int(math.log(120 / HISTOGRAM_MIN) / math.log(HISTOGRAM_GROWTH)) + 2
+
+# Latency objectives used when a site has no "slo" entry in monitored_urls.json
+DEFAULT_SLO = {
+    "p50": 1.0,
+    "p95": 3.0,
+    "p99": 5.0,
+    "window_minutes": 15,
+    "min_samples": 3
+}
+
+def get_slo(site):
+    """Return the latency objectives for a monitored site, filling in defaults."""
+    slo = dict(DEFAULT_SLO)
+    slo.update(site.get("slo") or {})
+    return slo
+
+class LatencyHistogram:
+    """Compact, mergeable latency histogram with log-scaled buckets (HDR-style).
+
+    Counts live in a single array of unsigned ints, so each histogram costs
+    under 1 KB regardless of how many samples it holds.
+    """
+
+    def __init__(self):
+        self.counts = array('I', bytes(4 * HISTOGRAM_BUCKETS))
+        self.total = 0
+
+    @staticmethod
+    def bucket_for(value):
+        if value <= HISTOGRAM_MIN:
+            return 0
+        index = int(math.log(value / HISTOGRAM_MIN) / math.log(HISTOGRAM_GROWTH)) + 1
+        return min(index, HISTOGRAM_BUCKETS - 1)
+
+    @staticmethod
+    def bucket_value(index):
+        """Representative value (geometric midpoint) of a bucket."""
+        if index == 0:
+            return HISTOGRAM_MIN
+        low = HISTOGRAM_MIN * HISTOGRAM_GROWTH ** (index - 1)
+        return low * math.sqrt(HISTOGRAM_GROWTH)
+
+    def record(self, value):
+        self.counts[self.bucket_for(value)] += 1
+        self.total += 1
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+
+    def percentile(self, p):
+        if not self.total:
+            return None
+        rank = max(1, int(math.ceil(p / 100.0 * self.total)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bucket_value(index)
+        return self.bucket_value(HISTOGRAM_BUCKETS - 1)
+
+class RollingHistogram:
+    """Ring of per-slot histograms covering a sliding time window.
+
+    Slots are only allocated once they receive a sample, so idle sites cost
+    almost nothing.
+    """
+
+    def __init__(self, window_seconds=900, slot_seconds=60):
+        self.slot_seconds = slot_seconds
+        self.slot_count = max(1, int(window_seconds // slot_seconds))
+        # slot index -> (slot start epoch, histogram)
+        self.slots = [None] * self.slot_count
+
+    def record(self, value, now=None):
+        now = time.time() if now is None else now
+        epoch = int(now // self.slot_seconds)
+        index = epoch % self.slot_count
+        slot = self.slots[index]
+        if slot is None or slot[0] != epoch:
+            if slot is not None and slot[0] > epoch:
+                return  # Sample older than the window
+            slot = (epoch, LatencyHistogram())
+            self.slots[index] = slot
+        slot[1].record(value)
+
+    def merged(self, now=None):
+        """Merge every slot still inside the window into one histogram."""
+        now = time.time() if now is None else now
+        oldest = int(now // self.slot_seconds) - self.slot_count + 1
+        result = LatencyHistogram()
+        for slot in self.slots:
+            if slot is not None and slot[0] >= oldest:
+                result.merge(slot[1])
+        return result
+
+def classify_latency(histogram, slo):
+    """Classify a window of latencies against an SLO.
+
+    Returns 'Slow' when the p95 objective is missed, 'Degraded' when the p50
+    or p99 objective is missed, and None when the site is within its SLO or
+    there are not enough samples to judge.
+    """
+    if histogram.total < slo["min_samples"]:
+        return None
+    if histogram.percentile(95) > slo["p95"]:
+        return 'Slow'
+    if histogram.percentile(50) > slo["p50"] or histogram.percentile(99) > slo["p99"]:
+        return 'Degraded'
+    return None
+
+class LatencyTracker:
+    """Keep a rolling latency histogram per URL and the last phase breakdown."""
+
+    def __init__(self, slot_seconds=60):
+        self.slot_seconds = slot_seconds
+        self.histograms = {}
+        self.last_timings = {}
+        # Read offsets for timings.jsonl files already ingested
+        self.file_offsets = {}
+        self.lock = threading.Lock()
+
+    def _histogram(self, url, window_minutes):
+        histogram = self.histograms.get(url)
+        if histogram is None or histogram.slot_count != max(1, int(window_minutes * 60 // self.slot_seconds)):
+            histogram = RollingHistogram(window_minutes * 60, self.slot_seconds)
+            self.histograms[url] = histogram
+        return histogram
+
+    def record(self, url, timings, when=None, window_minutes=DEFAULT_SLO["window_minutes"]):
+        with self.lock:
+            if self.last_timings.get(url) is timings:
+                return  # Same shared probe result handed out twice
+            self._histogram(url, window_minutes).record(timings["total"], when)
+            self.last_timings[url] = timings
+
+    def ingest_file(self, url, path, window_minutes=DEFAULT_SLO["window_minutes"]):
+        """Read the timings a monitor appended to path since the last call."""
+        if not os.path.exists(path):
+            return
+        offset = self.file_offsets.get(path, 0)
+        if os.path.getsize(path) < offset:
+            offset = 0  # File was replaced
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Incomplete line, read it next time
+                offset += len(line)
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    continue
+                timings = {phase: record.get(phase, 0.0) for phase in PHASES + ("total",)}
+                self.record(url, timings, record.get("time"), window_minutes)
+        self.file_offsets[path] = offset
+
+    def window(self, url):
+        """Return the merged histogram for the URL's current window."""
+        with self.lock:
+            histogram = self.histograms.get(url)
+            return histogram.merged() if histogram else LatencyHistogram()
+
+    def percentiles(self, url, points=(50, 95, 99)):
+        """Return {p: seconds} over the current window, or None if there is no data."""
+        window = self.window(url)
+        if not window.total:
+            return None
+        return {p: window.percentile(p) for p in points}
+
+    def classify(self, url, slo):
+        return classify_latency(self.window(url), slo)
+
+    def last(self, url):
+        with self.lock:
+            return self.last_timings.get(url)
@@ -0,0 +1,157 @@
+import os
+import gzip
+import copy
+import json
+import queue
+import atexit
+import shutil
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = os.path.join(os.getcwd(), "webmonitor.jsonl")
+
+# Context fields copied onto every record logged while they are set
+CONTEXT_FIELDS = ("url", "iteration", "stage")
+_context = contextvars.ContextVar("webmonitor_log_context", default={})
+
+# Noisy third-party loggers, unless WEBMONITOR_LOG_LEVELS says otherwise
+DEFAULT_MODULE_LEVELS = {
+    "urllib3": "WARNING",
+    "PIL": "WARNING",
+    "webmonitor.ui": "INFO"
+}
+
+def push_context(**fields):
+    """Add fields to the log context of the current thread; returns a token for pop_context."""
+    return _context.set({**_context.get(), **fields})
+
+def pop_context(token):
+    _context.reset(token)
+
+@contextmanager
+def log_context(**fields):
+    """Attach fields (url, iteration, stage...) to every record logged in this block."""
+    token = push_context(**fields)
+    try:
+        yield
+    finally:
+        pop_context(token)
+
+class ContextFilter(logging.Filter):
+    """Copy the caller's log context onto the record.
+
+    Runs on the QueueHandler, in the logging thread, because context
+    variables are not visible from the listener thread. Fields passed with
+    `extra=` take precedence.
+    """
+
+    def filter(self, record):
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, context and exception."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _RecordQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message, for the JSON "exception" field."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler whose rotated files are gzip-compressed (webmonitor.jsonl.1.gz...)."""
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+class _ConsoleFilter(logging.Filter):
+    # Status messages already show in the windows; keep them in the file only
+    def filter(self, record):
+        return not record.name.startswith("webmonitor.ui")
+
+_listener = None
+_setup_lock = threading.Lock()
+
+def _parse_levels(spec):
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging(level=None, log_file=LOG_FILE, module_levels=None):
+    """Route all logging through a queue to a JSON rotating file and the console.
+
+    Callers only pay for putting the record on a queue; formatting and file
+    I/O happen on the listener thread. Levels come from WEBMONITOR_LOG_LEVEL
+    (root) and WEBMONITOR_LOG_LEVELS ("dashboard=DEBUG,catalog=WARNING").
+    Safe to call more than once; only the first call configures anything.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        level = (level or os.environ.get("WEBMONITOR_LOG_LEVEL", "INFO")).upper()
+        file_handler = CompressingRotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5,
+                                                      encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
+        console_handler.addFilter(_ConsoleFilter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _RecordQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        levels = dict(DEFAULT_MODULE_LEVELS)
+        levels.update(module_levels or {})
+        levels.update(_parse_levels(os.environ.get("WEBMONITOR_LOG_LEVELS")))
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level)
+
+        _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
@@ -0,0 +1,208 @@
+import os
+import threading
+import logging
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+# Default port for the local /metrics endpoint
+DEFAULT_METRICS_PORT = 9108
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """Base class for a labelled metric family."""
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # [per-bucket counts, sum, count]
+                state = [[0] * len(self.buckets), 0.0, 0]
+                self.values[key] = state
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state[0]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state[1])}")
+        lines.append(f"{self.name}_count{labels} {state[2]}")
+        return lines
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of the with-block in a histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+def render_metrics():
+    """Render every registered metric in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Monitor internals
+SITE_LABELS = ("url", "danger_level")
+
+FETCH_TOTAL = Counter("webmonitor_fetch_total", "HTML fetches attempted by the monitor.", SITE_LABELS)
+FETCH_ERRORS = Counter("webmonitor_fetch_errors_total", "HTML fetches that failed, by error class.",
+                       SITE_LABELS + ("error_class",))
+FETCH_DURATION = Histogram("webmonitor_fetch_duration_seconds", "Time spent in fetch_html.", SITE_LABELS,
+                           buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+PARSE_DURATION = Histogram("webmonitor_parse_duration_seconds", "Time spent in modify_html.", SITE_LABELS)
+DIFF_DURATION = Histogram("webmonitor_diff_duration_seconds", "Time spent in generate_diff.", SITE_LABELS)
+CHANGES_DETECTED = Counter("webmonitor_changes_total", "Page changes seen, by severity (minor, change, major).",
+                           SITE_LABELS + ("severity",))
+BYTES_WRITTEN = Counter("webmonitor_bytes_written_total", "Bytes written to the output directory, by file kind.",
+                        SITE_LABELS + ("kind",))
+SCHEDULER_LAG = Histogram("webmonitor_scheduler_lag_seconds", "Delay between a cycle's scheduled and actual start.",
+                          SITE_LABELS, buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30))
+CYCLE_ERRORS = Counter("webmonitor_cycle_errors_total", "Monitoring cycles that failed.", SITE_LABELS)
+MONITOR_RESTARTS = Counter("webmonitor_monitor_restarts_total",
+                           "Continuous monitors restarted after a fatal error.", SITE_LABELS)
+ACTIVE_MONITORS = Gauge("webmonitor_active_monitors", "Monitoring threads currently running.", ("danger_level",))
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/debug/profile":
+            self._start_profile(parse_qs(query))
+            return
+        if path != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_profile(self, params):
+        """Start a sampling profile of this process: /debug/profile?seconds=N"""
+        from profiling import capture_profile
+        try:
+            seconds = min(float(params.get("seconds", ["30"])[0]), 600)
+        except ValueError:
+            self.send_error(400, "seconds must be a number")
+            return
+        path = capture_profile(seconds, os.getcwd())
+        body = f"Profiling for {seconds:g}s, writing {path}\n".encode("utf-8")
+        self.send_response(202)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would otherwise flood the console
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=DEFAULT_METRICS_PORT, host="127.0.0.1"):
+    """Start the /metrics HTTP endpoint in a background thread (once per process)."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Metrics endpoint unavailable on {host}:{port}: {e}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+        logger.info(f"Metrics available at http://{host}:{port}/metrics")
+        return _server
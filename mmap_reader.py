@@ -0,0 +1,97 @@
+import os
+import mmap
+import threading
+from collections import OrderedDict
+
+class MappedFile:
+    """Read-only memory map of a text file.
+
+    The file is never read into a Python string: lines are found by
+    searching the mapping and only the byte ranges asked for are decoded. Mappings are backed by the OS page cache,
+    so every window (and process) reading the same file shares its pages.
+    Only suited to files that are not rewritten in place; monitor outputs
+    are written once under a new name, or replaced through a rename.
+    A mapped file cannot be deleted on Windows, so close() releases the
+    mapping when it is not needed for a while; it is mapped again on the
+    next read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._data = None
+        self.lock = threading.RLock()
+
+    @property
+    def data(self):
+        """The mapping, opened on first use and again after close()."""
+        with self.lock:
+            if self._data is None:
+                with open(self.path, 'rb') as f:
+                    # Empty files cannot be mapped
+                    self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+            return self._data
+
+    def close(self):
+        """Unmap the file."""
+        with self.lock:
+            if isinstance(self._data, mmap.mmap):
+                self._data.close()
+            self._data = None
+
+    def text(self, start=0, end=None):
+        """Decoded bytes start to end of the file."""
+        end = self.size if end is None else end
+        with self.lock:
+            return self.data[start:end].decode('utf-8', errors='replace')
+
+    def find_line_starts(self, prefix):
+        """Byte offsets of the lines starting with the bytes prefix."""
+        with self.lock:
+            data = self.data
+            found = [0] if data[:len(prefix)] == prefix else []
+            needle = b"\n" + prefix
+            position = data.find(needle)
+            while position != -1:
+                found.append(position + 1)
+                position = data.find(needle, position + 1)
+            return found
+
+class MappedFileCache:
+    """Mapped files by path, reused while the file is unchanged.
+
+    Evicted files are unmapped; a reader still holding one maps it again
+    on its next read.
+    """
+
+    def __init__(self, size=32):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            mapped = self.entries.get(key)
+            if mapped is not None:
+                self.entries.move_to_end(key)
+                return mapped
+        mapped = MappedFile(path)
+        evicted = []
+        with self.lock:
+            self.entries[key] = mapped
+            while len(self.entries) > self.size:
+                evicted.append(self.entries.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return mapped
+
+    def release(self, path):
+        """Unmap every cached mapping of path, so the file can be deleted."""
+        with self.lock:
+            mapped = [entry for key, entry in self.entries.items() if key[0] == path]
+        for entry in mapped:
+            entry.close()
+
+MAPPED_FILES = MappedFileCache()
@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+
+from metrics import Histogram
+from log_setup import push_context, pop_context
+
+logger = logging.getLogger(__name__)
+
+STAGE_DURATION = Histogram("webmonitor_stage_duration_seconds",
+                           "Time spent in each stage of a monitoring cycle (stage timers enabled only).",
+                           ("url", "stage"))
+
+# Stage timers are off unless WEBMONITOR_STAGE_TIMERS=1 or enabled from the GUI
+_stage_timers_enabled = os.environ.get("WEBMONITOR_STAGE_TIMERS") == "1"
+
+def set_stage_timers_enabled(enabled):
+    global _stage_timers_enabled
+    _stage_timers_enabled = bool(enabled)
+
+def stage_timers_enabled():
+    return _stage_timers_enabled
+
+class _StageContext:
+    """Names the stage in the log context; returned while stage timers are off."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.token = push_context(stage=self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pop_context(self.token)
+        return False
+
+class _StageTimer(_StageContext):
+    def __init__(self, name, url):
+        super().__init__(name)
+        self.url = url
+
+    def __enter__(self):
+        super().__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        STAGE_DURATION.observe(elapsed, url=self.url, stage=self.name)
+        logger.debug(f"Stage {self.name} for {self.url}: {elapsed * 1000:.1f} ms")
+        return super().__exit__(exc_type, exc, tb)
+
+def stage(name, url=""):
+    """Time one stage of a monitoring cycle.
+
+    While stage timers are disabled this only sets the stage field of the
+    log context (see log_setup), which costs about a microsecond.
+    """
+    if not _stage_timers_enabled:
+        return _StageContext(name)
+    return _StageTimer(name, url)
+
+class SamplingProfiler:
+    """Sample the stacks of every thread and aggregate them as folded stacks.
+
+    The output uses the collapsed-stack format ("frame;frame;frame count")
+    produced by `py-spy record --format raw`, so it can be fed directly to
+    flamegraph.pl, speedscope or inferno.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+
+    def _sample(self, own_ident):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            frames.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(frames))] += 1
+        self.samples += 1
+
+    def run(self, seconds):
+        own_ident = threading.get_ident()
+        end_time = time.perf_counter() + seconds
+        while time.perf_counter() < end_time:
+            self._sample(own_ident)
+            time.sleep(self.interval)
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def capture_profile(seconds, output_dir, on_done=None):
+    """Profile the running process for `seconds` in the background.
+
+    The folded-stack profile is written to <output_dir>/profiles/ and
+    on_done(path) is called from the profiler thread once it is saved.
+    Returns the path the profile will be written to.
+    """
+    profile_dir = os.path.join(output_dir, "profiles")
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.folded")
+
+    def run():
+        profiler = SamplingProfiler()
+        profiler.run(seconds)
+        profiler.write(path)
+        logger.info(f"Profile saved to {path} ({profiler.samples} samples)")
+        if on_done:
+            on_done(path)
+
+    threading.Thread(target=run, name="sampling-profiler", daemon=True).start()
+    return path
@@ -0,0 +1,88 @@
+import re
+import json
+import time
+import hashlib
+
+from bs4 import BeautifulSoup
+
+# Each region of a watched view starts with this header line
+REGION_HEADER = re.compile(r"^<!-- region: (.*) \| ([0-9a-f]+|absent) -->$", re.MULTILINE)
+
+def region_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+def _normalize(element):
+    # One tag or text run per line, without indentation, so line diffs stay readable
+    lines = (line.strip() for line in element.prettify().splitlines())
+    return "\n".join(line for line in lines if line)
+
+def selector_error(selector):
+    """Return None if selector can be watched, otherwise the reason it cannot."""
+    if not isinstance(selector, str) or not selector.strip():
+        return f"Sélecteur vide ou invalide: {selector!r}"
+    # The selector is written in the region header line of every view
+    if "\n" in selector or "-->" in selector or " | " in selector:
+        return f"Sélecteur invalide '{selector}': retour à la ligne, '-->' ou ' | '"
+    try:
+        BeautifulSoup("", 'html.parser').select(selector)
+    except Exception as e:
+        return f"Sélecteur invalide '{selector}': {str(e).splitlines()[0]}"
+    return None
+
+def extract_regions(html, selectors, excluded_indices=()):
+    """Return {selector: normalized HTML of its matches, or None if nothing matched}.
+
+    excluded_indices are removed first, numbered like modify_html does.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    if excluded_indices:
+        excluded = set(excluded_indices)
+        for idx, tag in enumerate(soup.find_all()):
+            if idx in excluded:
+                tag.decompose()
+    regions = {}
+    for selector in selectors:
+        try:
+            matches = soup.select(selector)
+        except Exception as e:
+            raise ValueError(f"Sélecteur invalide '{selector}': {e}") from e
+        regions[selector] = "\n".join(_normalize(match) for match in matches) if matches else None
+    return regions
+
+def render_view(regions):
+    """Join the regions into the text that is snapshotted and diffed in place of the page."""
+    parts = []
+    for selector, text in regions.items():
+        if text is None:
+            parts.append(f"<!-- region: {selector} | absent -->")
+        else:
+            parts.append(f"<!-- region: {selector} | {region_hash(text)} -->\n{text}")
+    return "\n".join(parts)
+
+def view_hashes(view):
+    """{selector: hash or None} read back from a view's region headers."""
+    return {selector: (None if digest == "absent" else digest) for selector, digest in REGION_HEADER.findall(view)}
+
+def view_regions(view):
+    """{selector: text or None} read back from a view."""
+    regions = {}
+    matches = list(REGION_HEADER.finditer(view))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(view)
+        text = view[match.end():end].strip("\n")
+        regions[match.group(1)] = None if match.group(2) == "absent" else text
+    return regions
+
+def history_line(iteration, base_view, view):
+    """regions.jsonl record: every region's hash, plus the new content of the regions that changed."""
+    before = view_hashes(base_view)
+    current = view_regions(view)
+    hashes = {selector: (region_hash(text) if text is not None else None) for selector, text in current.items()}
+    changed = [selector for selector, digest in hashes.items() if before.get(selector, "") != digest]
+    return json.dumps({
+        "iteration": iteration,
+        "time": time.time(),
+        "regions": hashes,
+        "changed": changed,
+        "content": {selector: current[selector] for selector in changed}
+    }, ensure_ascii=False) + "\n"
@@ -0,0 +1,257 @@
+"""Thin out and archive old monitoring outputs.
+
+Every run directory keeps all its cycles for keep_all_days. Older cycles
+are thinned to one snapshot per hour until hourly_days, then to one per day.
+A thinned cycle loses its snapshot; its diff and changes files are kept
+when changes were detected, so the history of changes stays complete.
+Finished runs whose last write is older than keep_all_days are packed into
+<run_dir>.tar.gz next to the directory. Runs are compacted in a process
+pool, since the work is mostly compression.
+
+Monitors can keep writing meanwhile: the run a live monitor writes and the
+latest run of every URL are never archived, only cycles older than
+keep_all_days are thinned, and a run's latest cycle and its status,
+manifest and history files are never touched.
+
+    python retention.py --dry-run
+    python retention.py --workers 4
+"""
+import os
+import re
+import json
+import time
+import shutil
+import tarfile
+import logging
+import argparse
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import catalog
+from config import get_config
+from log_setup import setup_logging
+from storage import UNCHANGED_DIFFS
+
+logger = logging.getLogger(__name__)
+
+# Per danger level: days every cycle is kept, then days one cycle per hour is kept;
+# after that one cycle per day is kept
+DEFAULT_RETENTION = {
+    "Critical": {"keep_all_days": 30, "hourly_days": 90},
+    "High": {"keep_all_days": 14, "hourly_days": 60},
+    "Medium": {"keep_all_days": 7, "hourly_days": 30},
+    "Low": {"keep_all_days": 3, "hourly_days": 14}
+}
+
+# Hours between two retention passes of the background job, 0 to disable it
+DEFAULT_RETENTION_INTERVAL = float(os.environ.get("WEBMONITOR_RETENTION_INTERVAL_HOURS", "6"))
+
+ARCHIVE_SUFFIX = ".tar.gz"
+# Per-cycle files; everything else in a run directory is kept as is
+CYCLE_FILE = re.compile(r"(snapshot|diff|changes)_(\d+)\.(html|txt|json)$")
+
+def get_retention_policy(site):
+    """Return the retention policy for a monitored site, filling in defaults from its danger level."""
+    policy = dict(DEFAULT_RETENTION.get(site.get("danger_level"), DEFAULT_RETENTION["Low"]))
+    policy.update(site.get("retention") or {})
+    return policy
+
+def disk_usage(path):
+    """Total size in bytes of a file or of every file under a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(directory, name))
+            except OSError:
+                pass  # Removed by a writer meanwhile (temporary file)
+    return total
+
+def _cycles(run_dir):
+    """Return {iteration: {kind: file name}} for the per-cycle files of a run."""
+    cycles = {}
+    for name in os.listdir(run_dir):
+        match = CYCLE_FILE.match(name)
+        if match:
+            cycles.setdefault(int(match.group(2)), {})[match.group(1)] = name
+    return cycles
+
+def _has_changes(run_dir, files):
+    if "changes" in files:
+        return True
+    if "diff" not in files:
+        return False
+    try:
+        with open(os.path.join(run_dir, files["diff"]), 'r', encoding='utf-8') as f:
+            head = f.read(32)
+    except OSError:
+        return True  # Keep what cannot be checked
+    return not head.startswith(UNCHANGED_DIFFS)
+
+def thin_cycles(run_dir, policy, now=None, protected=(), dry_run=False):
+    """Delete the files of cycles the policy no longer keeps; return (files, bytes) removed.
+
+    A cycle's time is its snapshot's modification time. In each hourly or
+    daily bucket the oldest cycle is kept; iterations in protected are
+    always kept.
+    """
+    now = now or time.time()
+    keep_all_before = now - policy["keep_all_days"] * 86400
+    hourly_before = now - policy["hourly_days"] * 86400
+    seen_buckets = set()
+    removed, freed = 0, 0
+    for iteration, files in sorted(_cycles(run_dir).items()):
+        if iteration in protected or "snapshot" not in files:
+            continue
+        try:
+            written = os.path.getmtime(os.path.join(run_dir, files["snapshot"]))
+        except OSError:
+            continue
+        if written >= keep_all_before:
+            continue
+        bucket = ("hour", int(written // 3600)) if written >= hourly_before else ("day", int(written // 86400))
+        if bucket not in seen_buckets:
+            seen_buckets.add(bucket)
+            continue
+        doomed = ["snapshot"]
+        if not _has_changes(run_dir, files):
+            doomed += [kind for kind in ("diff", "changes") if kind in files]
+        for kind in doomed:
+            path = os.path.join(run_dir, files[kind])
+            try:
+                size = os.path.getsize(path)
+                if not dry_run:
+                    os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+            freed += size
+    return removed, freed
+
+def archive_run(run_dir):
+    """Pack run_dir into run_dir.tar.gz, then remove the directory; return the archive path."""
+    archive = run_dir.rstrip(os.sep) + ARCHIVE_SUFFIX
+    tmp_path = archive + ".tmp"
+    with tarfile.open(tmp_path, "w:gz") as tar:
+        tar.add(run_dir, arcname=os.path.basename(run_dir.rstrip(os.sep)))
+    os.replace(tmp_path, archive)
+    shutil.rmtree(run_dir)
+    return archive
+
+def compact_run(run_dir, policy, now, protected=(), archive=False, dry_run=False):
+    """Thin one run and archive it if allowed; runs in a worker process."""
+    removed, freed = thin_cycles(run_dir, policy, now, protected, dry_run)
+    archived = None
+    if archive and not dry_run:
+        archived = archive_run(run_dir)
+    return {"run_dir": run_dir, "files_removed": removed, "bytes_removed": freed,
+            "archived": archived or (run_dir + ARCHIVE_SUFFIX if archive else None)}
+
+def _site_usage(output_root, url):
+    """Bytes used by url's runs and archives under output_root."""
+    if not os.path.isdir(output_root):
+        return 0
+    prefix = catalog.run_dir_prefix(url)
+    return sum(disk_usage(os.path.join(output_root, name)) for name in os.listdir(output_root)
+               if name.startswith(prefix) and
+               catalog.RUN_SUFFIX.fullmatch(name[len(prefix):].replace(ARCHIVE_SUFFIX, "")))
+
+def plan(sites, now=None):
+    """Return the compaction jobs for every configured site's runs on disk."""
+    now = now or time.time()
+    # Index runs on disk first, so the latest run of a URL is known even if the catalog had missed it
+    for site in sites:
+        if "output_dir" in site:
+            catalog.index_existing_runs(site["output_dir"], [site["url"]])
+    live = {monitor["run_dir"] for monitor in catalog.live_monitors().values()}
+    latest = {run["run_dir"] for run in catalog.latest_runs().values()}
+    jobs = []
+    for site in sites:
+        if "output_dir" not in site:
+            continue
+        policy = get_retention_policy(site)
+        for run in catalog.runs_for(site["url"]):
+            run_dir = run["run_dir"]
+            if not os.path.isdir(run_dir):
+                continue
+            manifest = run["manifest"] or {}
+            protected = {manifest["iteration"]} if "iteration" in manifest else set()
+            finished = run_dir not in live and run_dir not in latest
+            archive = finished and run["heartbeat"] < now - policy["keep_all_days"] * 86400
+            jobs.append({"url": site["url"], "run_dir": run_dir, "policy": policy,
+                         "protected": protected, "archive": archive})
+    return jobs
+
+def run_retention(sites=None, workers=None, dry_run=False, now=None):
+    """Apply the retention policies once; return {url: usage report}.
+
+    Each report has the bytes used by the site's outputs before and after,
+    and the number of files removed and runs archived.
+    """
+    now = now or time.time()
+    sites = sites if sites is not None else get_config().sites()
+    jobs = plan(sites, now)
+    report = {}
+    for site in sites:
+        if "output_dir" in site:
+            report[site["url"]] = {"before": _site_usage(site["output_dir"], site["url"]),
+                                   "files_removed": 0, "bytes_removed": 0, "runs_archived": 0}
+    if jobs:
+        # Spawned, not forked: this runs from a thread of the GUI process (Tk, monitors, SQLite)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(compact_run, job["run_dir"], job["policy"], now, job["protected"],
+                                   job["archive"], dry_run): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Retention failed for {job['run_dir']}: {e}")
+                    continue
+                site_report = report[job["url"]]
+                site_report["files_removed"] += result["files_removed"]
+                site_report["bytes_removed"] += result["bytes_removed"]
+                if result["archived"]:
+                    site_report["runs_archived"] += 1
+                    if not dry_run:
+                        catalog.forget_run(job["run_dir"])
+    for site in sites:
+        if site["url"] in report:
+            site_report = report[site["url"]]
+            site_report["after"] = (site_report["before"] - site_report["bytes_removed"] if dry_run
+                                    else _site_usage(site["output_dir"], site["url"]))
+            logger.info(f"Retention for {site['url']}: {site_report['before']} -> {site_report['after']} bytes, "
+                        f"{site_report['files_removed']} files removed, {site_report['runs_archived']} runs archived")
+    return report
+
+_job = None
+
+def start_retention_job(interval_hours=DEFAULT_RETENTION_INTERVAL, workers=2):
+    """Run retention in a background thread every interval_hours (first pass after one interval)."""
+    global _job
+    if _job is not None or interval_hours <= 0:
+        return
+    def loop():
+        while True:
+            time.sleep(interval_hours * 3600)
+            try:
+                run_retention(workers=workers)
+            except Exception as e:
+                logger.error(f"Retention pass failed: {e}")
+    _job = threading.Thread(target=loop, name="retention", daemon=True)
+    _job.start()
+
+def main():
+    parser = argparse.ArgumentParser(description="Alléger et archiver les anciennes sorties de surveillance.")
+    parser.add_argument("--workers", type=int, default=None, help="processus de compression")
+    parser.add_argument("--dry-run", action="store_true", help="afficher le résultat sans rien supprimer")
+    args = parser.parse_args()
+    setup_logging()
+    report = run_retention(workers=args.workers, dry_run=args.dry_run)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import time
+import threading
+
+from metrics import Counter
+
+# Results younger than this are handed to later callers instead of fetching again.
+# Kept below the shortest monitoring interval so a monitor never reuses its own last fetch.
+DEFAULT_FRESHNESS = float(os.environ.get("WEBMONITOR_FETCH_FRESHNESS", "1"))
+
+SHARED_RESULTS = Counter("webmonitor_shared_results_total",
+                         "Calls answered by another caller's in-flight or fresh result.", ("group",))
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and receive the same result (or exception). A
+    successful result is also reused by callers arriving within `freshness`
+    seconds after it finished. Failures are never reused.
+    """
+
+    def __init__(self, name, freshness=DEFAULT_FRESHNESS):
+        self.name = name
+        self.freshness = freshness
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.last_purge = time.monotonic()
+
+    def _purge(self, now):
+        # Drop finished results that went stale; at most once per freshness window
+        if now - self.last_purge < max(self.freshness, 1):
+            return
+        self.last_purge = now
+        for key in [key for key, call in self.calls.items()
+                    if call.finished_at is not None and now - call.finished_at > self.freshness]:
+            del self.calls[key]
+
+    def do(self, key, fn, *args, **kwargs):
+        now = time.monotonic()
+        with self.lock:
+            self._purge(now)
+            call = self.calls.get(key)
+            if call is not None and (call.finished_at is None or now - call.finished_at <= self.freshness):
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                leader = True
+        if not leader:
+            SHARED_RESULTS.inc(group=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self.lock:
+                if self.calls.get(key) is call:
+                    del self.calls[key]
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            call.done.set()
+
+    def forget(self, key):
+        """Make the next call for key run again even if a fresh result exists."""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None and call.finished_at is not None:
+                del self.calls[key]
@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import time
+import queue
+import logging
+import tempfile
+import threading
+from collections import deque
+
+from metrics import BYTES_WRITTEN, Counter
+from profiling import stage
+import catalog
+
+logger = logging.getLogger(__name__)
+
+WRITE_ERRORS = Counter("webmonitor_write_errors_total", "Cycle batches that failed to commit.", ("url", "danger_level"))
+
+# Written last in every cycle: readers that go through it only ever see complete cycles
+MANIFEST_FILE = "latest.json"
+STATUS_FILE = "status.txt"
+
+# Appended files (timings.jsonl, regions.jsonl) are rotated to <name>.1 past this size
+MAX_APPEND_BYTES = int(float(os.environ.get("WEBMONITOR_MAX_APPEND_MB", "5")) * 1024 * 1024)
+# Unchanged cycles whose files are kept per run in continuous monitoring
+DEFAULT_KEEP_CYCLES = int(os.environ.get("WEBMONITOR_KEEP_CYCLES", "500"))
+# Seconds between two checkpoints of the catalog's write-ahead log
+CHECKPOINT_INTERVAL = 15 * 60
+
+# First words of the diff file of a cycle that reported no change
+UNCHANGED_DIFFS = ("No changes detected.", "Minor change ignored")
+_DIFF_FILE = re.compile(r"diff_(\d+)\.txt$")
+
+def atomic_write(path, data, fsync=False):
+    """Write text to path so readers see either the old or the new content, never a partial file."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def read_manifest(output_dir):
+    """Return the manifest of the last committed cycle in output_dir, or None."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class CycleBatch:
+    """All the files one monitoring cycle produces, committed together."""
+
+    def __init__(self, output_dir, url="", danger_level=""):
+        self.output_dir = output_dir
+        self.url = url
+        self.danger_level = danger_level
+        self.files = []
+        self.appends = []
+        self.deletes = []
+        self.status_message = None
+        self.manifest = None
+        self.state = None
+
+    def write(self, name, text, kind="data"):
+        self.files.append((name, text, kind))
+
+    def append(self, name, text, kind="data"):
+        self.appends.append((name, text, kind))
+
+    def delete(self, name):
+        """Remove an older file of the run once this batch's files are written."""
+        self.deletes.append(name)
+
+    def set_status(self, status_message, **manifest):
+        """Set status.txt and the manifest fields; both are written after every other file."""
+        self.status_message = status_message
+        self.manifest = dict(manifest, status_message=status_message, url=self.url, time=time.time())
+
+    def set_state(self, **state):
+        """Set the monitor state to resume from once this batch is on disk (see catalog.load_state)."""
+        self.state = dict(state, url=self.url)
+
+    def commit(self, fsync=False):
+        labels = {"url": self.url, "danger_level": self.danger_level}
+        with stage("write", self.url):
+            for name, text, kind in self.files:
+                atomic_write(os.path.join(self.output_dir, name), text, fsync)
+                BYTES_WRITTEN.inc(len(text.encode('utf-8')), kind=kind, **labels)
+            for name, text, kind in self.appends:
+                path = os.path.join(self.output_dir, name)
+                try:
+                    if os.path.getsize(path) >= MAX_APPEND_BYTES:
+                        os.replace(path, path + ".1")
+                except FileNotFoundError:
+                    pass
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(text)
+                BYTES_WRITTEN.inc(len(text.encode('utf-8')), kind=kind, **labels)
+            for name in self.deletes:
+                try:
+                    os.remove(os.path.join(self.output_dir, name))
+                except FileNotFoundError:
+                    pass  # Already thinned by the retention job
+                except OSError as e:
+                    # Open elsewhere (Windows) or not allowed: the cycle itself must still commit
+                    logger.warning(f"Could not remove {name} from {self.output_dir}: {e}")
+            if self.status_message is not None:
+                atomic_write(os.path.join(self.output_dir, STATUS_FILE), self.status_message, fsync)
+                BYTES_WRITTEN.inc(len(self.status_message.encode('utf-8')), kind="status", **labels)
+                atomic_write(os.path.join(self.output_dir, MANIFEST_FILE), json.dumps(self.manifest), fsync)
+            if self.manifest is not None or self.state is not None:
+                try:
+                    catalog.record_cycle(self.output_dir, self.manifest, self.state)
+                except Exception as e:
+                    logger.warning(f"Could not update the run catalog for {self.output_dir}: {e}")
+
+class CycleWindow:
+    """Prune the files of unchanged cycles beyond the most recent `keep` of a run.
+
+    An unchanged cycle's snapshot repeats the baseline, so a monitor that
+    runs indefinitely keeps only a window of them; cycles with changes are
+    kept until the retention job thins them.
+    """
+
+    def __init__(self, keep=DEFAULT_KEEP_CYCLES):
+        self.keep = keep
+        self.unchanged = deque()
+
+    def load(self, output_dir):
+        """Fill the window with the unchanged cycles already in output_dir, for a resumed run."""
+        iterations = []
+        for name in os.listdir(output_dir):
+            match = _DIFF_FILE.match(name)
+            if not match or os.path.exists(os.path.join(output_dir, f"changes_{match.group(1)}.json")):
+                continue
+            try:
+                with open(os.path.join(output_dir, name), 'r', encoding='utf-8') as f:
+                    head = f.read(32)
+            except OSError:
+                continue
+            if head.startswith(UNCHANGED_DIFFS):
+                iterations.append(int(match.group(1)))
+        self.unchanged = deque(sorted(iterations))
+
+    def record(self, batch, iteration, has_changes):
+        """Note the cycle batch is committing; add the deletions of cycles leaving the window."""
+        if has_changes:
+            return
+        self.unchanged.append(iteration)
+        while len(self.unchanged) > self.keep:
+            old = self.unchanged.popleft()
+            batch.delete(f"snapshot_{old}.html")
+            batch.delete(f"diff_{old}.txt")
+
+class WriteBehindWriter:
+    """Commit cycle batches on a background thread, in submission order.
+
+    The queue is bounded so monitors slow down instead of buffering
+    unbounded amounts of HTML when the disk falls behind.
+    """
+
+    def __init__(self, max_pending=256, fsync=False):
+        self.fsync = fsync
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.last_checkpoint = time.monotonic()
+        self.thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self.thread.start()
+
+    def submit(self, batch):
+        self.queue.put(batch)
+
+    def flush(self):
+        """Block until every submitted batch has been committed."""
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            batch = self.queue.get()
+            try:
+                batch.commit(self.fsync)
+            except Exception as e:
+                WRITE_ERRORS.inc(url=batch.url, danger_level=batch.danger_level)
+                logger.error(f"Error writing outputs to {batch.output_dir}: {e}")
+            finally:
+                self.queue.task_done()
+            if time.monotonic() - self.last_checkpoint > CHECKPOINT_INTERVAL:
+                self.last_checkpoint = time.monotonic()
+                try:
+                    # Readers are always open, so the WAL is only reset by an explicit checkpoint
+                    catalog.checkpoint()
+                except Exception as e:
+                    logger.warning(f"Could not checkpoint the run catalog: {e}")
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Return the process-wide write-behind writer, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindWriter(fsync=os.environ.get("WEBMONITOR_FSYNC") == "1")
+        return _writer
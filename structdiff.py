@@ -0,0 +1,209 @@
+import os
+import re
+import hashlib
+import threading
+from difflib import SequenceMatcher
+from collections import OrderedDict
+
+from bs4 import BeautifulSoup, NavigableString, Comment
+
+# Before/after text kept per change
+MAX_TEXT = 300
+
+# A parsed tree takes some 50 times the memory of its HTML and about 4 s per MB to build:
+# larger pages only get the text diff, and cached trees are bounded by the size of their pages
+MAX_PAGE_CHARS = int(float(os.environ.get("WEBMONITOR_STRUCTDIFF_MAX_KB", "512")) * 1024)
+TREE_CACHE_CHARS = int(float(os.environ.get("WEBMONITOR_TREE_CACHE_MB", "1")) * 1024 * 1024)
+
+# Characters that must be escaped in a CSS identifier (Tailwind's md:flex, w-1/2, React's :r1: ids...)
+_CSS_SPECIAL = re.compile(r"([^\w-])")
+
+class Node:
+    """An element of the page with a Merkle hash of its whole subtree."""
+    __slots__ = ("name", "attrs", "id", "classes", "text", "children", "parent", "digest")
+
+    def __init__(self, name, attrs, parent, id=None, classes=()):
+        self.name = name
+        self.attrs = attrs
+        self.id = id
+        self.classes = classes
+        self.text = ""
+        self.children = []
+        self.parent = parent
+        self.digest = None
+
+    def own_digest(self):
+        """Hash of the element itself, without its children."""
+        return hashlib.blake2b(f"{self.name}\0{self.attrs}\0{self.text}".encode('utf-8'),
+                               digest_size=8).digest()
+
+    def full_text(self, limit=MAX_TEXT):
+        parts, stack = [], [self]
+        while stack and sum(len(part) for part in parts) < limit:
+            node = stack.pop()
+            if node.text:
+                parts.append(node.text)
+            stack.extend(reversed(node.children))
+        return " ".join(parts)[:limit]
+
+def _attrs_key(tag):
+    return " ".join(f"{key}={' '.join(value) if isinstance(value, list) else value}"
+                    for key, value in sorted(tag.attrs.items()))
+
+def build_tree(html):
+    """Parse html and hash every element's subtree bottom-up (iteratively, for deep pages)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    root = Node("[document]", "", None)
+    order = []
+    stack = [(soup, root)]
+    while stack:
+        tag, node = stack.pop()
+        order.append(node)
+        texts = []
+        for child in tag.children:
+            if isinstance(child, Comment):
+                continue
+            if isinstance(child, NavigableString):
+                text = child.strip()
+                if text:
+                    texts.append(text)
+            elif child.name:
+                child_node = Node(child.name, _attrs_key(child), node, child.get("id"), child.get("class") or ())
+                node.children.append(child_node)
+                stack.append((child, child_node))
+        node.text = " ".join(texts)
+    # Parents come before their children in `order`, so walk it backwards
+    for node in reversed(order):
+        digest = hashlib.blake2b(node.own_digest(), digest_size=8)
+        for child in node.children:
+            digest.update(child.digest)
+        node.digest = digest.digest()
+    return root
+
+class TreeCache:
+    """Keep the trees of recent pages so a baseline is not parsed again.
+
+    The cache is bounded by the total length of the pages' HTML, which the
+    trees' memory grows with, rather than by their number.
+    """
+
+    def __init__(self, max_chars=TREE_CACHE_CHARS):
+        self.max_chars = max_chars
+        self.chars = 0
+        self.trees = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, html):
+        key = hashlib.blake2b(html.encode('utf-8'), digest_size=16).digest()
+        with self.lock:
+            entry = self.trees.get(key)
+            if entry is not None:
+                self.trees.move_to_end(key)
+                return entry[0]
+        tree = build_tree(html)
+        with self.lock:
+            if key not in self.trees:
+                self.trees[key] = (tree, len(html))
+                self.chars += len(html)
+            # The newest tree stays, even alone over the budget: it is the next cycle's baseline
+            while self.chars > self.max_chars and len(self.trees) > 1:
+                self.chars -= self.trees.popitem(last=False)[1][1]
+        return tree
+
+_trees = TreeCache()
+
+def css_escape(name):
+    """Escape name for use as a CSS identifier (class or id)."""
+    escaped = _CSS_SPECIAL.sub(r"\\\1", name)
+    # Identifiers cannot start with a digit, nor with a hyphen and a digit
+    start = 1 if escaped.startswith("-") else 0
+    if escaped[start:start + 1].isdigit():
+        escaped = f"{escaped[:start]}\\{ord(escaped[start]):x} {escaped[start + 1:]}"
+    return escaped
+
+def selector(node):
+    """CSS selector for node, anchored at the closest ancestor with an id."""
+    parts = []
+    while node is not None and node.parent is not None:
+        if node.id:
+            parts.append(f"{node.name}#{css_escape(node.id)}")
+            break
+        same = [sibling for sibling in node.parent.children if sibling.name == node.name]
+        part = node.name + "".join(f".{css_escape(name)}" for name in node.classes)
+        if len(same) > 1:
+            part += f":nth-of-type({same.index(node) + 1})"
+        parts.append(part)
+        node = node.parent
+    return " > ".join(reversed(parts))
+
+def _change(kind, before, after):
+    node = after if after is not None else before
+    return {
+        "selector": selector(node),
+        "change": kind,
+        "before": before.full_text() if before is not None else "",
+        "after": after.full_text() if after is not None else ""
+    }
+
+def compare_trees(before, after, max_changes=50):
+    """List the smallest subtrees that differ between two trees.
+
+    Subtrees whose hashes match are skipped without being visited, so the
+    work grows with the size of the change rather than the size of the page.
+    Returns (changes, truncated).
+    """
+    changes = []
+    stack = [(before, after)]
+    while stack:
+        old, new = stack.pop()
+        if old.digest == new.digest:
+            continue
+        if len(changes) >= max_changes:
+            return changes, True
+        if old.name != new.name:
+            changes.append(_change("replaced", old, new))
+            continue
+        if old.attrs != new.attrs or old.text != new.text:
+            changes.append(_change("modified", old, new))
+        matcher = SequenceMatcher(None, [child.digest for child in old.children],
+                                  [child.digest for child in new.children], autojunk=False)
+        pairs = []
+        for op, i1, i2, j1, j2 in matcher.get_opcodes():
+            if op == "equal":
+                continue
+            removed, added = old.children[i1:i2], new.children[j1:j2]
+            # Same-position elements with the same tag are edits of one another: look inside them
+            same = 0
+            while same < min(len(removed), len(added)) and removed[same].name == added[same].name:
+                pairs.append((removed[same], added[same]))
+                same += 1
+            removed, added = removed[same:], added[same:]
+            changes.extend(_change("removed", node, None) for node in removed)
+            changes.extend(_change("added", None, node) for node in added)
+        stack.extend(reversed(pairs))
+    truncated = len(changes) > max_changes
+    return changes[:max_changes], truncated
+
+def structural_diff(base_html, new_html, max_changes=50):
+    """Compare two pages element by element; return {"changes": [...], "truncated": bool}.
+
+    Returns None for pages over MAX_PAGE_CHARS, which keep only their text diff.
+    """
+    if max(len(base_html), len(new_html)) > MAX_PAGE_CHARS:
+        return None
+    changes, truncated = compare_trees(_trees.get(base_html), _trees.get(new_html), max_changes)
+    return {"changes": changes, "truncated": truncated}
+
+def format_changes(report):
+    """Readable version of a structural_diff report for the dashboard."""
+    labels = {"added": "Ajouté", "removed": "Supprimé", "modified": "Modifié", "replaced": "Remplacé"}
+    lines = [f"{len(report['changes'])} élément(s) modifié(s)"
+             + (" (liste tronquée)" if report.get("truncated") else ""), ""]
+    for change in report["changes"]:
+        lines.append(f"[{labels.get(change['change'], change['change'])}] {change['selector']}")
+        if change["before"]:
+            lines.append(f"  Avant: {change['before']}")
+        if change["after"]:
+            lines.append(f"  Après: {change['after']}")
+        lines.append("")
+    return "\n".join(lines)
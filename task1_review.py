@@ -2,6 +2,7 @@ import requests
 import time
 import os
 import difflib
+import json
 import threading
 from bs4 import BeautifulSoup
 import customtkinter as ctk
@@ -9,49 +10,65 @@ from tkinter import messagebox, filedialog
 import logging
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import json
 import re
 from urllib.parse import urlparse
+from latency import shared_timed_get, timings_line
+from storage import CycleBatch, CycleWindow, atomic_write, get_writer
+import catalog
+from config import get_config
+from singleflight import SingleFlight
+from doccache import DOCUMENTS, content_hash
+from structdiff import structural_diff
+from regions import extract_regions, render_view, history_line, selector_error
+from fingerprint import (FINGERPRINTS, DEFAULT_CHANGE_THRESHOLDS, change_magnitude, classify_change,
+                         get_change_thresholds)
+from urlutils import validate_url, normalize_url
+from metrics import (FETCH_TOTAL, FETCH_ERRORS, FETCH_DURATION, PARSE_DURATION, DIFF_DURATION,
+                     CHANGES_DETECTED, CYCLE_ERRORS, MONITOR_RESTARTS, SCHEDULER_LAG, ACTIVE_MONITORS, DEFAULT_METRICS_PORT, timed,
+                     start_metrics_server)
+from ui_channel import UIChannel, append_trimmed
+from profiling import stage, capture_profile, set_stage_timers_enabled, stage_timers_enabled
+from log_setup import setup_logging, log_context
+from retention import start_retention_job
 
-# Configuration de la journalisation
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
 
-# Initialize tasks_monitored_urls from file if it exists, otherwise use default
 def load_monitored_urls():
-    """Load monitored URLs from a file."""
-    file_path = os.path.join(os.getcwd(), "monitored_urls.json")
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading monitored URLs: {e}")
-    return []
+    """Load monitored URLs from the shared configuration service."""
+    return get_config().sites()
 
 def save_monitored_urls(urls):
-    """Save monitored URLs to a file."""
-    file_path = os.path.join(os.getcwd(), "monitored_urls.json")
+    """Replace the whole monitored URLs list (prefer get_config().upsert_site/remove_site)."""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(urls, f, indent=4)
+        get_config().save(urls)
     except Exception as e:
-        print(f"Error saving monitored URLs: {e}")
+        logger.error(f"Error saving monitored URLs: {e}")
 
-# Load monitored URLs from file
-tasks_monitored_urls = load_monitored_urls()
+FETCH_TIMEOUT = 10
+FETCH_RETRIES = 5
+FETCH_BACKOFF = 1
+# Longest fetch_html can take: every attempt timing out on connect then on read, plus the backoffs
+FETCH_DEADLINE = (FETCH_RETRIES + 1) * 2 * FETCH_TIMEOUT + \
+    sum(min(Retry.DEFAULT_BACKOFF_MAX, FETCH_BACKOFF * 2 ** n) for n in range(FETCH_RETRIES))
+STATUS_TIMEOUT = 5
+# Longest a monitoring cycle can take: status check, a re-baseline fetch and the cycle's fetch
+CYCLE_DEADLINE = 2 * STATUS_TIMEOUT + 2 * FETCH_DEADLINE + 60
 
 # Utility Functions
-def fetch_html(url):
+def fetch_html(url, danger_level=""):
     session = requests.Session()
-    retries = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    retries = Retry(total=FETCH_RETRIES, backoff_factor=FETCH_BACKOFF, status_forcelist=[429, 500, 502, 503, 504])
     session.mount('https://', HTTPAdapter(max_retries=retries))
+    FETCH_TOTAL.inc(url=url, danger_level=danger_level)
     try:
-        response = session.get(url, timeout=10)
-        response.raise_for_status()
+        with timed(FETCH_DURATION, url=url, danger_level=danger_level):
+            response = session.get(url, timeout=FETCH_TIMEOUT)
+            response.raise_for_status()
         return response.text
     except requests.exceptions.RequestException as e:
-        logging.error(f"Fetch error: {e}")
-        raise Exception(f"Erreur de récupération de l'URL: {e}")
+        FETCH_ERRORS.inc(url=url, danger_level=danger_level, error_class=type(e).__name__)
+        logger.error(f"Fetch error: {e}")
+        raise Exception(f"Erreur de récupération de l'URL: {e}") from e
 
 def modify_html(html, excluded_indices):
     soup = BeautifulSoup(html, 'html.parser')
@@ -60,8 +77,54 @@ def modify_html(html, excluded_indices):
             tag.decompose()
     return str(soup)
 
-def generate_diff(base_html, mod_html, diff_path):
-    """Generate a diff between two HTML contents and save it to a file."""
+# Monitors of the same page (same normalized URL) share fetches and parses
+_fetches = SingleFlight("fetch")
+
+# A page loaded to pick tags this recently is used as the monitoring baseline
+BASELINE_MAX_AGE = 120
+
+# Current comparison baseline of a run, rewritten whenever the baseline moves
+BASELINE_FILE = "baseline.html"
+
+# Longest wait between two attempts of a failing monitor, in seconds
+MAX_BACKOFF = 30 * 60
+# Consecutive failed cycles after which a monitor drops its caches and takes a new baseline
+HEAL_AFTER_ERRORS = 3
+
+def backoff_delay(failures, interval):
+    """Seconds to wait after `failures` consecutive failures: the interval, doubled per failure, capped."""
+    interval = max(1, interval)
+    return int(min(max(interval, MAX_BACKOFF), interval * 2 ** min(failures, 16)))
+
+def fetch_shared(url, danger_level=""):
+    """fetch_html, sharing one request between monitors of the same normalized URL."""
+    return _fetches.do(normalize_url(url), fetch_html, url, danger_level)
+
+def modify_shared(url, html, excluded_indices):
+    """modify_html, sharing the result between monitors that got the same page and exclusions.
+
+    Results live in the document cache, so an unchanged page is not parsed again.
+    """
+    return DOCUMENTS.put(url, html).modified(excluded_indices, modify_html)
+
+def page_view(url, html, excluded_indices, selectors=None):
+    """The text a monitor snapshots and diffs for this page.
+
+    The whole page minus the excluded tags by default; with watch_selectors,
+    only the matching regions (see regions.render_view), so snapshots and
+    diffs scale with the watched regions instead of the page.
+    """
+    if not selectors:
+        return modify_shared(url, html, excluded_indices)
+    key = ("regions", tuple(selectors), tuple(sorted(excluded_indices)))
+    return DOCUMENTS.put(url, html).derive(
+        key, lambda page: render_view(extract_regions(page, selectors, excluded_indices)))
+
+def compute_diff(base_html, mod_html):
+    """Compute the unified diff between two HTML contents.
+
+    Returns the text to store in diff_N.txt and whether anything changed.
+    """
     try:
         # Convert to strings if they're not already
         base_html = str(base_html)
@@ -76,22 +139,151 @@ def generate_diff(base_html, mod_html, diff_path):
             tofile='modified'
         ))
         
-        # Write the diff to the file
         if diff:
-            with open(diff_path, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(diff))
-            return True
+            return '\n'.join(diff), True
+        # Placeholder text to indicate no changes
+        return "No changes detected.", False
+    except Exception as e:
+        logger.error(f"Error generating diff: {e}")
+        return f"Error generating diff: {e}", False
+
+def generate_diff(base_html, mod_html, diff_path):
+    """Generate a diff between two HTML contents and save it to a file."""
+    diff_text, has_changes = compute_diff(base_html, mod_html)
+    atomic_write(diff_path, diff_text)
+    return has_changes
+
+def run_monitor_cycle(url, danger_level, excluded, output_dir, iteration, base_html, status, main_port,
+                      timings=None, report=None, selectors=None, thresholds=None, state=None, window=None):
+    """Run one monitoring iteration: fetch, snapshot, diff and status.txt.
+
+    The cycle's files are handed to the write-behind writer as one batch:
+    snapshot, diff and timings land first, then status.txt and latest.json,
+    each through an atomic rename, so readers never see a partial cycle.
+    Each snapshot is fingerprinted with SimHash; the magnitude sets the
+    severity (major past thresholds["major"]). Every change is diffed unless
+    the site sets a "change" threshold (see fingerprint.get_change_thresholds):
+    changes under it are then recorded as minor, without a full diff, and
+    the baseline is kept.
+    Returns the baseline to compare the next iteration against and whether
+    changes were detected. report(message) receives progress messages.
+    With a state dict (baseline_hash, settings), the baseline is saved to
+    baseline.html when it moves and the state is recorded in the catalog
+    with the cycle, so a restarted monitor can resume (see resume_state).
+    A CycleWindow prunes the files of unchanged cycles that leave it.
+    """
+    report = report or (lambda message: None)
+    thresholds = thresholds or DEFAULT_CHANGE_THRESHOLDS.get(danger_level, DEFAULT_CHANGE_THRESHOLDS["Low"])
+    labels = {"url": url, "danger_level": danger_level}
+    batch = CycleBatch(output_dir, url, danger_level)
+    
+    # Keep the phase timings alongside the other monitoring outputs
+    if timings:
+        batch.append("timings.jsonl", timings_line(iteration, status, timings), kind="timings")
+    
+    # Fetch current HTML
+    report(f"Récupération du HTML depuis {url}...")
+    with stage("fetch", url):
+        cur_html = fetch_shared(url, danger_level)
+    with stage("parse", url), timed(PARSE_DURATION, **labels):
+        mod_html = page_view(url, cur_html, excluded, selectors)
+    
+    # Per-region history: hashes every cycle, content when a region changed
+    if selectors:
+        batch.append("regions.jsonl", history_line(iteration, base_html, mod_html), kind="regions")
+    
+    # Snapshot
+    snapshot_name = f"snapshot_{iteration}.html"
+    batch.write(snapshot_name, mod_html, kind="snapshot")
+    
+    # Score the change from the fingerprints before paying for a diff
+    with stage("fingerprint", url):
+        fingerprint = FINGERPRINTS.get(mod_html)
+        if mod_html == base_html:
+            magnitude, severity = 0.0, None
         else:
-            # Create an empty file to indicate no changes
-            with open(diff_path, 'w', encoding='utf-8') as f:
-                f.write("No changes detected.")
-            return False
+            magnitude = change_magnitude(FINGERPRINTS.get(base_html), fingerprint)
+            severity = classify_change(magnitude, thresholds)
+            # Alert rules can route on danger_level and severity
+            CHANGES_DETECTED.inc(severity=severity, **labels)
+    
+    # Generate diff
+    diff_name = f"diff_{iteration}.txt"
+    if severity in ("change", "major"):
+        with stage("diff", url), timed(DIFF_DURATION, **labels):
+            diff_text, has_changes = compute_diff(base_html, mod_html)
+    elif severity == "minor":
+        diff_text, has_changes = f"Minor change ignored (magnitude {magnitude:.3f}).", False
+    else:
+        diff_text, has_changes = "No changes detected.", False
+    batch.write(diff_name, diff_text, kind="diff")
+    
+    # Locate the changed elements so the dashboard can show selectors instead of the raw diff
+    changes_name = None
+    if has_changes:
+        try:
+            with stage("structdiff", url):
+                changes = structural_diff(base_html, mod_html)
+            # None for pages too large to parse into trees: the dashboard shows the text diff
+            if changes is not None:
+                changes_name = f"changes_{iteration}.json"
+                batch.write(changes_name, json.dumps(changes, ensure_ascii=False), kind="changes")
+        except Exception as e:
+            logger.warning(f"Structural diff failed for {url}: {e}")
+    
+    current_time = time.strftime("%H:%M:%S")
+    
+    # Create status message with site status and changes
+    if has_changes:
+        label = "majeurs" if severity == "major" else f"ampleur {magnitude:.2f}"
+        status_message = f"Status: {status} | Port: {main_port} | Changements détectés ({label}) à {current_time}"
+        base_html = mod_html  # Update base HTML for next comparison
+    elif severity == "minor":
+        status_message = f"Status: {status} | Port: {main_port} | Changements mineurs ignorés (ampleur {magnitude:.2f}) à {current_time}"
+    else:
+        status_message = f"Status: {status} | Port: {main_port} | Pas de changements détectés à {current_time}"
+    
+    if state is not None:
+        if has_changes or state.get("baseline_hash") is None:
+            batch.write(BASELINE_FILE, base_html, kind="baseline")
+            state["baseline_hash"] = content_hash(base_html)
+        batch.set_state(iteration=iteration, baseline_hash=state["baseline_hash"], settings=state["settings"],
+                        last_check=time.time())
+    if window is not None:
+        window.record(batch, iteration, has_changes)
+    
+    batch.set_status(status_message, iteration=iteration, snapshot=snapshot_name, diff=diff_name,
+                     changes=changes_name, has_changes=has_changes, status=status, main_port=main_port,
+                     fingerprint=f"{fingerprint:016x}", magnitude=round(magnitude, 4), severity=severity)
+    get_writer().submit(batch)
+    report(f"Snapshot sauvegardé pour {url}: {snapshot_name}")
+    
+    return base_html, has_changes
+
+def resume_state(url, settings):
+    """Return the saved state of url's monitor, with its baseline, if it can go on with these settings.
+
+    The state is that of the last committed cycle; None if there is none,
+    the settings (excluded tags, watched regions) changed since, or the
+    baseline file is missing or does not match its recorded hash.
+    """
+    try:
+        state = catalog.load_state(url)
     except Exception as e:
-        logging.error(f"Error generating diff: {e}")
-        # Create a file with the error message
-        with open(diff_path, 'w', encoding='utf-8') as f:
-            f.write(f"Error generating diff: {e}")
-        return False
+        logger.warning(f"Could not load the saved state of {url}: {e}")
+        return None
+    if state is None or state["settings"] != settings:
+        return None
+    try:
+        with open(os.path.join(state["run_dir"], BASELINE_FILE), 'r', encoding='utf-8', newline='') as f:
+            base_html = f.read()
+    except OSError:
+        return None
+    if content_hash(base_html) != state["baseline_hash"]:
+        logger.warning(f"Saved baseline of {url} does not match its hash, starting a new run")
+        return None
+    state["base_html"] = base_html
+    return state
 
 # GUI Classes
 class TagSelector(ctk.CTkFrame):
@@ -176,7 +368,14 @@ class WebMonitorApp(ctk.CTk):
         # Dictionary to track multiple monitoring threads: {url: (thread, stop_event)}
         self.monitoring_threads = {}
         
-        self.monitored_urls = tasks_monitored_urls
+        # Worker threads report through this channel instead of self.after(0, ...)
+        self.ui = UIChannel(self, self.show_status_messages)
+        
+        # Shared configuration; edits from other windows or processes are applied as they happen
+        self.config = get_config()
+        self.monitored_urls = self.config.sites()
+        self.config.subscribe(self.on_config_changed)
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.danger_levels = ["Low", "Medium", "High", "Critical"]
 
         # Configure grid layout
@@ -190,8 +389,20 @@ class WebMonitorApp(ctk.CTk):
         self.create_monitored_list()
         self.tag_selector = TagSelector(self)
         self.tag_selector.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
+        # Recent activity, trimmed; the full history goes to webmonitor.jsonl
+        self.grid_rowconfigure(3, weight=0)
+        self.activity_log = ctk.CTkTextbox(self, height=90, wrap="word")
+        self.activity_log.grid(row=3, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 5))
         self.status_bar = ctk.CTkLabel(self, text="Prêt", anchor="w")
-        self.status_bar.grid(row=2, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
+        self.status_bar.grid(row=2, column=0, sticky="ew", padx=10, pady=5)
+        self.cache_label = ctk.CTkLabel(self, text="", anchor="e")
+        self.cache_label.grid(row=2, column=1, sticky="ew", padx=10, pady=5)
+        self.update_cache_stats()
+        
+        # Expose monitor internals on http://127.0.0.1:<port>/metrics
+        start_metrics_server(int(os.environ.get("WEBMONITOR_METRICS_PORT", DEFAULT_METRICS_PORT)))
+        # Thin and archive old outputs every WEBMONITOR_RETENTION_INTERVAL_HOURS
+        start_retention_job()
 
     def create_controls(self):
         control_frame = ctk.CTkFrame(self)
@@ -208,16 +419,23 @@ class WebMonitorApp(ctk.CTk):
         self.load_btn.pack(side="left", padx=5)
         self.add_btn = ctk.CTkButton(url_frame, text="Ajouter", command=self.add_url)
         self.add_btn.pack(side="left", padx=5)
+        self.import_btn = ctk.CTkButton(url_frame, text="Importer", width=90, command=self.import_urls)
+        self.import_btn.pack(side="left", padx=5)
         settings_frame = ctk.CTkFrame(control_frame)
         settings_frame.pack(fill="x", pady=5)
         ctk.CTkLabel(settings_frame, text="Intervalle (s):").pack(side="left")
         self.interval_entry = ctk.CTkEntry(settings_frame, width=80)
         self.interval_entry.insert(0, "30")
         self.interval_entry.pack(side="left", padx=5)
-        ctk.CTkLabel(settings_frame, text="Durée (min):").pack(side="left", padx=10)
+        ctk.CTkLabel(settings_frame, text="Durée (min, 0 = continue):").pack(side="left", padx=10)
         self.duration_entry = ctk.CTkEntry(settings_frame, width=80)
         self.duration_entry.insert(0, "60")
         self.duration_entry.pack(side="left", padx=5)
+        self.stage_timers_var = ctk.BooleanVar(value=stage_timers_enabled())
+        ctk.CTkCheckBox(settings_frame, text="Chronométrer les étapes", variable=self.stage_timers_var,
+                        command=lambda: set_stage_timers_enabled(self.stage_timers_var.get())).pack(side="left", padx=10)
+        self.profile_btn = ctk.CTkButton(settings_frame, text="Profiler (30 s)", width=120, command=self.capture_profile)
+        self.profile_btn.pack(side="left", padx=5)
         self.start_btn = ctk.CTkButton(control_frame, text="Démarrer la Surveillance", command=self.toggle_monitoring, fg_color="#2AAA8A", hover_color="#228B22")
         self.start_btn.pack(side="right", padx=5)
 
@@ -266,12 +484,8 @@ class WebMonitorApp(ctk.CTk):
                         initialdir=os.getcwd()
                     )
                     if output_dir:
-                        for site in self.monitored_urls:
-                            if site["url"] == u:
-                                site["output_dir"] = output_dir
-                                self.update_status(f"Dossier de sauvegarde mis à jour pour {u}: {output_dir}")
-                                break
-                        save_monitored_urls(self.monitored_urls)
+                        self.config.upsert_site({"url": u, "output_dir": output_dir})
+                        self.update_status(f"Dossier de sauvegarde mis à jour pour {u}: {output_dir}")
                 except Exception as e:
                     self.update_status(f"Erreur lors de la sélection du dossier: {str(e)}")
             
@@ -310,8 +524,26 @@ class WebMonitorApp(ctk.CTk):
         }.get(level, "#FFFFFF")
 
     def update_status(self, message):
-        self.status_bar.configure(text=message)
-        self.update_idletasks()
+        """Show a message right away (Tk thread only; workers use post_status)."""
+        self.show_status_messages([message])
+        self.ui.logger.info(message)
+
+    def post_status(self, message, url=None):
+        """Report a status message from any thread, coalesced per URL."""
+        self.ui.post(message, url)
+
+    def show_status_messages(self, messages):
+        self.status_bar.configure(text=messages[-1])
+        timestamp = time.strftime("%H:%M:%S")
+        append_trimmed(self.activity_log, [f"[{timestamp}] {message}" for message in messages])
+
+    def update_cache_stats(self):
+        """Show document cache hits and misses next to the status bar, every 5 seconds."""
+        stats = DOCUMENTS.stats()
+        self.cache_label.configure(
+            text=f"Cache: {stats['hits']} succès / {stats['misses']} échecs "
+                 f"({stats['hit_rate']:.0%}) | {stats['entries']} pages, {stats['bytes'] / (1024 * 1024):.1f} Mo")
+        self.after(5000, self.update_cache_stats)
 
     def load_tags_threaded(self):
         url = self.url_entry.get().strip()
@@ -331,39 +563,43 @@ class WebMonitorApp(ctk.CTk):
 
     def load_tags(self):
         try:
-            self.after(0, self.loading_screen.update_progress, 0.1, "Récupération du HTML...")
+            self.ui.call(self.loading_screen.update_progress, 0.1, "Récupération du HTML...")
             html = fetch_html(self.current_url)
-            soup = BeautifulSoup(html,'html.parser')
+            # Cached so that starting the monitor next reuses this page and its parse
+            tags = DOCUMENTS.put(self.current_url, html).tags()
             self.tag_selector.clear_tags()
             
-            total_tags = len(soup.find_all())
-            for idx, tag in enumerate(soup.find_all()):
-                self.after(0, self.tag_selector.add_tag, idx, tag.name, tag.attrs)
+            total_tags = len(tags)
+            for idx, name, attrs in tags:
+                self.ui.call(self.tag_selector.add_tag, idx, name, attrs)
                 if idx % 50 == 0:
                     progress = min(0.9, (idx / total_tags) * 0.9)  # Keep last 10% for completion
-                    self.after(0, self.loading_screen.update_progress, progress, f"{idx} balises chargées...")
+                    self.ui.call(self.loading_screen.update_progress, progress, f"{idx} balises chargées...")
             
             # Restore previously selected tags if they exist
-            entry = next((item for item in self.monitored_urls if item["url"] == self.current_url), None)
+            entry = self.config.get(self.current_url)
             if entry and "excluded_tags" in entry:
                 for idx in entry["excluded_tags"]:
                     if idx < len(self.tag_selector.checkboxes):
                         self.tag_selector.checkboxes[idx].set(True)
             
-            self.after(0, self.loading_screen.update_progress, 1.0, f"{total_tags} balises chargées")
+            self.ui.call(self.loading_screen.update_progress, 1.0, f"{total_tags} balises chargées")
             self.current_html = html
         except Exception as e:
-            self.after(0, messagebox.showerror, "Erreur", str(e))
+            self.ui.call(messagebox.showerror, "Erreur", str(e))
         finally:
-            self.after(0, self.load_btn.configure, {"state":"normal","text":"Charger les Balises"})
-            self.after(1000, self.loading_screen.destroy)  # Close loading screen after 1 second
+            # Queued behind the tags, so the button comes back once they are all shown
+            self.ui.call(lambda: self.load_btn.configure(state="normal", text="Charger les Balises"))
+            self.ui.call(self.after, 1000, self.loading_screen.destroy)  # Close loading screen after 1 second
 
     def add_url(self):
         url = self.url_entry.get().strip()
         danger_level = self.danger_combo.get()
-        if not url.startswith(('http://','https://')):
-            messagebox.showerror("Erreur URL","URL doit commencer par http:// ou https://")
+        error = validate_url(url)
+        if error:
+            messagebox.showerror("Erreur URL", error)
             return
+        url = normalize_url(url)
         if danger_level not in self.danger_levels:
             messagebox.showerror("Erreur Niveau Danger","Veuillez sélectionner un niveau de danger valide")
             return
@@ -371,26 +607,52 @@ class WebMonitorApp(ctk.CTk):
         # Get selected tags before clearing
         selected_tags = self.tag_selector.get_selected_indices()
         
-        existing = next((item for item in self.monitored_urls if item["url"] == url), None)
-        if existing:
-            existing["danger_level"] = danger_level
-            existing["excluded_tags"] = selected_tags
-        else:
-            self.monitored_urls.append({
-                "url": url, 
-                "danger_level": danger_level,
-                "excluded_tags": selected_tags
-            })
+        # Save to file, merging with any concurrent edits
+        self.config.upsert_site({
+            "url": url, 
+            "danger_level": danger_level,
+            "excluded_tags": selected_tags
+        })
+        self.monitored_urls = self.config.sites()
         self.update_monitored_list()
         # Reset the tag selector and URL entry
         self.tag_selector.clear_tags()
         self.url_entry.delete(0, "end")
         self.danger_combo.set("Select Danger Level")
         self.load_btn.configure(state="normal", text="Charger les Balises")
-        # Save the updated list to file
-        save_monitored_urls(self.monitored_urls)
         messagebox.showinfo("Succès",f"Site ajouté avec niveau de danger: {danger_level}")
 
+    def import_urls(self):
+        """Bulk-import sites from a CSV or JSON file (see bulk_import.py)."""
+        path = filedialog.askopenfilename(title="Importer des sites",
+                                          filetypes=[("CSV ou JSON", "*.csv *.json *.txt"), ("Tous", "*.*")])
+        if not path:
+            return
+        danger_level = self.danger_combo.get()
+        if danger_level not in self.danger_levels:
+            danger_level = "Low"
+        self.import_btn.configure(state="disabled")
+        self.loading_screen = LoadingScreen(self)
+        self.loading_screen.update_progress(0, "Lecture du fichier...")
+        threading.Thread(target=self.run_import, args=(path, danger_level), daemon=True).start()
+
+    def run_import(self, path, danger_level):
+        from bulk_import import read_rows, import_sites
+        try:
+            report = import_sites(read_rows(path), danger_level, config=self.config,
+                                  progress=lambda done, total: self.ui.call(
+                                      self.loading_screen.update_progress, done / total,
+                                      f"{done}/{total} pages analysées"))
+            message = (f"{len(report['added'])} sites ajoutés, {len(report['rejected'])} rejetés, "
+                       f"{len(report['discovery_failed'])} pages inaccessibles")
+            self.ui.call(messagebox.showinfo, "Import terminé", message)
+            self.post_status(message)
+        except Exception as e:
+            self.ui.call(messagebox.showerror, "Erreur", f"Import impossible: {e}")
+        finally:
+            self.ui.call(lambda: self.import_btn.configure(state="normal"))
+            self.ui.call(self.loading_screen.destroy)
+
     def remove_url(self, url):
         """Remove a URL from the monitored list."""
         # Stop monitoring if it's active
@@ -398,15 +660,13 @@ class WebMonitorApp(ctk.CTk):
             self.monitoring_threads[url][1].set()  # Set the stop event
             self.update_status(f"Surveillance arrêtée pour {url}")
         
-        # Remove from the list
-        self.monitored_urls = [item for item in self.monitored_urls if item["url"] != url]
+        # Remove from the file, merging with any concurrent edits
+        self.config.remove_site(url)
+        self.monitored_urls = self.config.sites()
         
         # Update the UI
         self.update_monitored_list()
         
-        # Save the updated list to file
-        save_monitored_urls(self.monitored_urls)
-        
         # Show confirmation
         self.update_status(f"Site supprimé: {url}")
 
@@ -415,6 +675,10 @@ class WebMonitorApp(ctk.CTk):
         if not url:
             messagebox.showerror("Erreur","Veuillez entrer une URL d'abord.")
             return
+        # Threads are keyed by the configured spelling of the URL
+        entry = self.config.get(url)
+        if entry:
+            url = entry["url"]
             
         # Check if this URL is already being monitored
         if url in self.monitoring_threads and self.monitoring_threads[url][0].is_alive():
@@ -425,7 +689,6 @@ class WebMonitorApp(ctk.CTk):
             self.update_monitored_list()
         else:
             # Start monitoring for this URL
-            entry = next((item for item in self.monitored_urls if item["url"] == url), None)
             if not entry:
                 messagebox.showerror("Erreur","Veuillez ajouter le site à la liste de surveillance avec un niveau de danger")
                 return
@@ -433,31 +696,81 @@ class WebMonitorApp(ctk.CTk):
             try:
                 interval = int(self.interval_entry.get())
                 duration = int(self.duration_entry.get())
-                if interval<=0 or duration<=0:
-                    raise ValueError("Les valeurs doivent être positives")
+                if interval<=0 or duration<0:
+                    raise ValueError("L'intervalle doit être positif et la durée positive ou nulle")
             except Exception as e:
                 messagebox.showerror("Erreur",f"Entrée invalide: {e}")
                 return
-                
-            # Create a new stop event for this monitoring instance
-            stop_event = threading.Event()
-            
-            # Create a new thread for this URL
-            monitor_thread = threading.Thread(
-                target=self.monitor_website, 
-                args=(url, stop_event, interval, duration),
-                daemon=True
-            )
-            
-            # Store the thread and stop event
-            self.monitoring_threads[url] = (monitor_thread, stop_event)
+            self.launch_monitor(url, interval, duration)
+
+    def launch_monitor(self, url, interval, duration):
+        """Start the monitoring thread for url; interval is in seconds and must be positive."""
+        if url in self.monitoring_threads and self.monitoring_threads[url][0].is_alive():
+            return
+        if interval <= 0:
+            # A monitor without a wait between cycles would fetch the site in a tight loop
+            logger.warning(f"Not starting a monitor for {url}: invalid interval {interval}")
+            self.update_status(f"Intervalle invalide pour {url}: surveillance non démarrée")
+            return
+        entry = self.config.get(url)
+        if entry:
+            self.current_danger_level = entry["danger_level"]
             
-            # Start the thread
-            monitor_thread.start()
+        # Create a new stop event for this monitoring instance
+        stop_event = threading.Event()
             
-            # Update the UI
-            self.update_status(f"Surveillance démarrée pour {url} - Niveau Danger: {self.current_danger_level}")
-            self.update_monitored_list()
+        # Create a new thread for this URL
+        monitor_thread = threading.Thread(
+            target=self.supervise_monitor, 
+            args=(url, stop_event, interval, duration),
+            daemon=True
+        )
+        
+        # Store the thread and stop event
+        self.monitoring_threads[url] = (monitor_thread, stop_event)
+        
+        # Start the thread
+        monitor_thread.start()
+        
+        # Update the UI
+        self.update_status(f"Surveillance démarrée pour {url} - Niveau Danger: {self.current_danger_level}")
+        self.update_monitored_list()
+
+    def on_config_changed(self, added, removed, changed):
+        """Called from the config watcher thread; hand the change over to the UI thread."""
+        self.ui.call(self.apply_config_changes, added, removed, changed)
+
+    def apply_config_changes(self, added, removed, changed):
+        """Apply an edit of monitored_urls.json to the running monitors.
+
+        Removed sites are stopped, added sites that carry an "interval" (in
+        minutes, as written by the Web Monitor window) are started, and changed
+        sites pick up their new settings on their next cycle. Other monitors
+        keep running untouched.
+        """
+        self.monitored_urls = self.config.sites()
+        for site in removed:
+            if site["url"] in self.monitoring_threads:
+                self.stop_monitoring(site["url"])
+        for site in added:
+            if site.get("interval") and site.get("output_dir"):
+                try:
+                    interval = int(site["interval"])
+                except (TypeError, ValueError):
+                    interval = 0
+                if interval <= 0:
+                    # The file can be edited by hand: never start a monitor without a wait
+                    logger.warning(f"Ignoring {site['url']}: invalid interval {site['interval']!r}")
+                    self.update_status(f"Intervalle invalide pour {site['url']}: surveillance non démarrée")
+                    continue
+                try:
+                    duration = int(self.duration_entry.get())
+                except ValueError:
+                    duration = 60
+                self.launch_monitor(site["url"], interval * 60, duration)
+        if changed:
+            self.update_status(f"Configuration mise à jour: {', '.join(site['url'] for site in changed)}")
+        self.update_monitored_list()
 
     def check_site_status(self, url):
         """Check if a site is up and get its port."""
@@ -473,128 +786,264 @@ class WebMonitorApp(ctk.CTk):
                 'https': 443
             }
             
-            # Check if site is up
-            response = requests.get(url, timeout=5)
-            is_up = response.status_code < 400
+            # Check if site is up, timing each phase of the request
+            response = shared_timed_get(url, timeout=STATUS_TIMEOUT)
+            is_up = response['status_code'] < 400
             
             # Get the actual port being used
-            actual_port = response.url.split(':')[-1].split('/')[0]
-            if not actual_port.isdigit():
-                actual_port = default_ports.get(scheme, 'unknown')
+            actual_port = urlparse(response['url']).port
+            if actual_port is None:
+                actual_port = default_ports.get(urlparse(response['url']).scheme, 'unknown')
             
             return {
                 'status': 'Up' if is_up else 'Down',
-                'main_port': str(actual_port)
+                'main_port': str(actual_port),
+                'timings': response['timings']
             }
         except Exception as e:
             return {
                 'status': 'Down',
-                'main_port': 'unknown'
+                'main_port': 'unknown',
+                'timings': None
             }
 
+    def supervise_monitor(self, url, stop_event, interval, duration):
+        """Run monitor_website; in continuous mode (duration 0), restart it after a fatal error.
+
+        Restarts back off like failing cycles do, and resume the run from
+        its saved state (see resume_state), so they cost no initial fetch.
+        """
+        failures = 0
+        try:
+            while True:
+                error = self.monitor_website(url, stop_event, interval, duration)
+                if error is False:
+                    return  # Not started, already reported
+                if error is None:
+                    self.ui.call(lambda: messagebox.showinfo("Terminé", f"Surveillance terminée pour {url}."))
+                    return
+                if duration or stop_event.is_set():
+                    self.ui.call(messagebox.showerror, "Erreur Critique", f"Erreur pour {url}: {error}")
+                    return
+                failures += 1
+                entry = self.config.get(url) or {}
+                MONITOR_RESTARTS.inc(url=url, danger_level=entry.get("danger_level", ""))
+                delay = backoff_delay(failures, interval)
+                logger.error(f"Monitor for {url} failed ({failures} in a row), restarting in {delay} s: {error}")
+                self.post_status(f"Erreur pour {url}: {error} - nouvel essai dans {delay} s", url)
+                if stop_event.wait(delay):
+                    return
+        finally:
+            if url in self.monitoring_threads and self.monitoring_threads[url][1] is stop_event:
+                del self.monitoring_threads[url]
+            self.ui.call(self.update_monitored_list)
+
     def monitor_website(self, url, stop_event, interval, duration):
-        """Monitor a specific website with its own parameters."""
+        """Monitor a specific website with its own parameters.
+
+        Runs for duration minutes, or until stopped when duration is 0.
+        Returns None when monitoring ended normally, False if it could not
+        start (already reported to the user), or the fatal error.
+        """
         # Get the output directory from the monitored URLs
-        entry = next((item for item in self.monitored_urls if item["url"] == url), None)
+        entry = self.config.get(url)
         if not entry or "output_dir" not in entry:
-            self.after(0, messagebox.showerror, "Erreur", "Dossier de sauvegarde non défini")
-            return
+            self.ui.call(messagebox.showerror, "Erreur", "Dossier de sauvegarde non défini")
+            return False
             
-        # Create a subfolder with site name and timestamp
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        site_name = url.replace('://', '_').replace('/', '_')
-        instance_id = f"{site_name}_{timestamp}"
-        output_dir = os.path.join(entry["output_dir"], instance_id)
+        # Get excluded tags: the current selection if it was loaded for this URL,
+        # otherwise the saved ones (which are followed if the config changes later)
+        config_excluded = entry.get("excluded_tags")
+        loaded_here = self.current_url and not validate_url(self.current_url) and \
+            normalize_url(self.current_url) == normalize_url(url)
+        selected = self.tag_selector.get_selected_indices() if loaded_here else []
+        excluded = selected or config_excluded or []
+        # Optional include-list: only these regions are snapshotted and diffed
+        selectors = config_selectors = entry.get("watch_selectors") or None
+        errors = [error for error in map(selector_error, selectors or []) if error]
+        if errors:
+            # Every cycle would fail on them: refuse to start rather than back off forever
+            self.ui.call(messagebox.showerror, "Erreur Sélecteurs", f"{url}: " + "; ".join(errors))
+            return False
+        
+        # Go on with the previous run if its baseline was saved with the same settings:
+        # no initial fetch, and changes made while no monitor ran are reported
+        state = resume_state(url, {"excluded": list(excluded), "selectors": selectors})
+        # A run is only resumed under the current output folder, where the catalog records it
+        if state is not None and os.path.isdir(state["run_dir"]) and \
+                os.path.normcase(os.path.abspath(os.path.dirname(state["run_dir"]))) == \
+                os.path.normcase(os.path.abspath(entry["output_dir"])):
+            output_dir = state["run_dir"]
+        else:
+            state = None
+            # Create a subfolder with site name and timestamp
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            site_name = catalog.run_dir_prefix(url)
+            instance_id = f"{site_name}_{timestamp}"
+            output_dir = os.path.join(entry["output_dir"], instance_id)
         
         try:
             os.makedirs(output_dir, exist_ok=True)
-            self.after(0, self.update_status, f"Dossier de sauvegarde pour {url}: {output_dir}")
+            catalog.register_run(url, output_dir, entry["output_dir"])
+            self.post_status(f"Dossier de sauvegarde pour {url}: {output_dir}", url)
         except Exception as e:
-            self.after(0, messagebox.showerror, "Erreur Dossier", f"Création du dossier impossible: {e}")
-            return
+            self.ui.call(messagebox.showerror, "Erreur Dossier", f"Création du dossier impossible: {e}")
+            return False
             
+        danger_level = entry["danger_level"]
+        labels = {"url": url, "danger_level": danger_level}
+        ACTIVE_MONITORS.inc(danger_level=danger_level)
+        # The initial fetch may take as long as a cycle
+        self.publish_heartbeat(url, output_dir, time.time(), None, grace=CYCLE_DEADLINE)
         try:
-            # Get excluded tags
-            excluded = self.tag_selector.get_selected_indices()
-            
-            # Fetch initial HTML
-            self.after(0, self.update_status, f"Récupération du HTML initial depuis {url}...")
-            base_html = fetch_html(url)
-            base_html = modify_html(base_html, excluded)
-            
-            # Save initial snapshot
-            initial_snap_file = os.path.join(output_dir, "initial_snapshot.html")
-            with open(initial_snap_file, 'w', encoding='utf-8') as f:
-                f.write(base_html)
-            self.after(0, self.update_status, f"Snapshot initial sauvegardé pour {url}: initial_snapshot.html")
+            if state is not None:
+                base_html = state["base_html"]
+                iteration = state["iteration"]
+                # The first check is due one interval after the last one, possibly already
+                wait = max(0, int(state["last_check"] + interval - time.time()))
+                state = {"baseline_hash": state["baseline_hash"], "settings": state["settings"]}
+                self.post_status(f"Reprise de la surveillance de {url} après l'itération {iteration}", url)
+            else:
+                # Fetch initial HTML
+                self.post_status(f"Récupération du HTML initial depuis {url}...", url)
+                document = DOCUMENTS.recent(url, BASELINE_MAX_AGE)
+                with stage("fetch", url):
+                    if document is None:
+                        document = DOCUMENTS.put(url, fetch_shared(url, danger_level))
+                with stage("parse", url), timed(PARSE_DURATION, **labels):
+                    base_html = page_view(url, document.html, excluded, selectors)
+                
+                # Save initial snapshot, which is also the first saved baseline
+                state = {"baseline_hash": content_hash(base_html),
+                         "settings": {"excluded": list(excluded), "selectors": selectors}}
+                initial_batch = CycleBatch(output_dir, url, danger_level)
+                initial_batch.write("initial_snapshot.html", base_html, kind="snapshot")
+                initial_batch.write(BASELINE_FILE, base_html, kind="baseline")
+                initial_batch.set_state(iteration=0, last_check=time.time(), **state)
+                get_writer().submit(initial_batch)
+                self.post_status(f"Snapshot initial sauvegardé pour {url}: initial_snapshot.html", url)
+                iteration = 0
+                wait = interval
             
             # Start monitoring loop
-            iteration = 0
-            end_time = time.time() + duration * 60
+            end_time = time.time() + duration * 60 if duration else None
+            last_cycle_duration = None
+            # In continuous mode only a window of unchanged cycles stays on disk
+            window = CycleWindow() if not duration else None
+            if window is not None:
+                # A resumed run's earlier unchanged cycles stay in the window, so restarts do not leak them
+                window.load(output_dir)
+            errors = 0
+            rebaseline = False
             
-            while time.time() < end_time and not stop_event.is_set():
+            while (end_time is None or time.time() < end_time) and not stop_event.is_set():
                 iteration += 1
                 
                 # Wait for the interval before taking the next snapshot
-                self.after(0, self.update_status, f"Attente de {interval} secondes avant le prochain snapshot pour {url}...")
-                for _ in range(interval):
+                self.post_status(f"Attente de {wait} secondes avant le prochain snapshot pour {url}...", url)
+                scheduled_time = time.time() + wait
+                self.publish_heartbeat(url, output_dir, scheduled_time, last_cycle_duration)
+                for _ in range(wait):
                     if stop_event.is_set():
                         break
                     time.sleep(1)
+                wait = interval
                 
                 if stop_event.is_set():
                     break
+                SCHEDULER_LAG.observe(max(0.0, time.time() - scheduled_time), **labels)
                     
-                try:
-                    # Check site status
-                    site_status = self.check_site_status(url)
-                    status = site_status['status']
-                    main_port = site_status['main_port']
-                    
-                    # Fetch current HTML
-                    self.after(0, self.update_status, f"Récupération du HTML depuis {url}...")
-                    cur_html = fetch_html(url)
-                    mod_html = modify_html(cur_html, excluded)
-                    
-                    # Save snapshot
-                    snap_file = os.path.join(output_dir, f"snapshot_{iteration}.html")
-                    with open(snap_file, 'w', encoding='utf-8') as f:
-                        f.write(mod_html)
-                    self.after(0, self.update_status, f"Snapshot sauvegardé pour {url}: snapshot_{iteration}.html")
-                    
-                    # Generate diff
-                    diff_path = os.path.join(output_dir, f"diff_{iteration}.txt")
-                    has_changes = generate_diff(base_html, mod_html, diff_path)
+                cycle_start = time.time()
+                # Stay listed as running however long the fetches and their retries take
+                self.publish_heartbeat(url, output_dir, cycle_start, last_cycle_duration, grace=CYCLE_DEADLINE)
+                with log_context(url=url, iteration=iteration):
+                    try:
+                        # Follow edits to this site's excluded tags and watched regions without restarting
+                        latest = self.config.get(url)
+                        if latest and (latest.get("excluded_tags") != config_excluded or
+                                       (latest.get("watch_selectors") or None) != config_selectors):
+                            config_excluded = latest.get("excluded_tags")
+                            config_selectors = latest.get("watch_selectors") or None
+                            excluded = config_excluded or []
+                            errors = [error for error in map(selector_error, config_selectors or []) if error]
+                            if errors:
+                                # Keep the previous regions until the file is fixed, rather than fail every cycle
+                                logger.warning(f"Ignoring invalid watch_selectors for {url}: {errors}")
+                                self.post_status(f"Sélecteurs ignorés pour {url}: {'; '.join(errors)}", url)
+                            else:
+                                selectors = config_selectors
+                            # Re-baseline so the new settings are not reported as a change
+                            rebaseline = True
+                            self.post_status(f"Balises exclues / régions mises à jour pour {url}", url)
+                        if rebaseline:
+                            base_html = page_view(url, fetch_shared(url, danger_level), excluded, selectors)
+                            state = {"baseline_hash": None, "settings": {"excluded": list(excluded),
+                                                                         "selectors": selectors}}
+                            rebaseline = False
                     
-                    # Update status file with current state
-                    status_file = os.path.join(output_dir, "status.txt")
-                    current_time = time.strftime("%H:%M:%S")
+                        # Check site status
+                        site_status = self.check_site_status(url)
+                        status = site_status['status']
+                        main_port = site_status['main_port']
                     
-                    # Create status message with site status and changes
-                    if has_changes:
-                        status_message = f"Status: {status} | Port: {main_port} | Changements détectés à {current_time}"
-                        base_html = mod_html  # Update base HTML for next comparison
-                    else:
-                        status_message = f"Status: {status} | Port: {main_port} | Pas de changements détectés à {current_time}"
+                        # Fetch, snapshot and diff the page
+                        base_html, has_changes = run_monitor_cycle(
+                            url, danger_level, excluded, output_dir, iteration, base_html, status, main_port,
+                            timings=site_status['timings'],
+                            report=lambda message: self.post_status(message, url),
+                            selectors=selectors, thresholds=get_change_thresholds(latest or entry), state=state,
+                            window=window)
+                        errors = 0
                     
-                    with open(status_file, 'w', encoding='utf-8') as f:
-                        f.write(status_message)
-                    
-                except Exception as e:
-                    self.after(0, self.update_status, f"Erreur pendant la surveillance de {url}: {str(e)}")
-                    time.sleep(5)  # Wait a bit before retrying
+                    except Exception as e:
+                        errors += 1
+                        CYCLE_ERRORS.inc(**labels)
+                        logger.error(f"Monitoring cycle failed for {url} ({errors} in a row): {e}", exc_info=True)
+                        self.post_status(f"Erreur pendant la surveillance de {url}: {str(e)}", url)
+                        if errors % HEAL_AFTER_ERRORS == 0:
+                            # Start over from a fresh fetch in case cached or baseline content is the problem
+                            _fetches.forget(normalize_url(url))
+                            DOCUMENTS.forget(url)
+                            rebaseline = True
+                            logger.warning(f"Resetting caches and baseline of {url} after {errors} failed cycles")
+                        # Back off while the site or the disk keeps failing
+                        wait = backoff_delay(errors, interval)
+                last_cycle_duration = time.time() - cycle_start
             
             # Monitoring completed
-            if url in self.monitoring_threads:
-                del self.monitoring_threads[url]
-            self.after(0, self.update_monitored_list)
-            self.after(0, lambda: messagebox.showinfo("Terminé", f"Surveillance terminée pour {url}."))
+            get_writer().flush()
+            return None
             
         except Exception as e:
-            if url in self.monitoring_threads:
-                del self.monitoring_threads[url]
-            self.after(0, self.update_monitored_list)
-            self.after(0, messagebox.showerror, "Erreur Critique", f"Erreur pour {url}: {str(e)}")
+            logger.error(f"Monitor for {url} stopped: {e}", exc_info=True)
+            return str(e)
+        finally:
+            ACTIVE_MONITORS.dec(danger_level=danger_level)
+            try:
+                catalog.clear_heartbeat(output_dir)
+            except Exception as e:
+                logger.warning(f"Could not clear heartbeat for {url}: {e}")
+
+    def publish_heartbeat(self, url, output_dir, next_check, last_cycle_duration, grace=None):
+        """Publish this monitor's liveness; a registry failure must not stop monitoring."""
+        try:
+            catalog.publish_heartbeat(url, output_dir, next_check, last_cycle_duration, grace)
+        except Exception as e:
+            logger.warning(f"Could not publish heartbeat for {url}: {e}")
+
+    def capture_profile(self, seconds=30):
+        """Capture a sampling profile of all monitoring threads next to the output directory."""
+        url = self.url_entry.get().strip()
+        entry = self.config.get(url)
+        if entry is None or "output_dir" not in entry:
+            entry = next((item for item in self.monitored_urls if "output_dir" in item), None)
+        output_dir = entry["output_dir"] if entry else os.getcwd()
+        try:
+            capture_profile(seconds, output_dir,
+                            on_done=lambda path: self.post_status(f"Profil sauvegardé: {path}"))
+            self.update_status(f"Profilage en cours pendant {seconds} s...")
+        except Exception as e:
+            self.update_status(f"Erreur lors du profilage: {str(e)}")
 
     def start_monitoring(self, url):
         """Start monitoring a specific URL."""
@@ -602,6 +1051,14 @@ class WebMonitorApp(ctk.CTk):
         self.url_entry.insert(0, url)
         self.toggle_monitoring()
     
+    def on_closing(self):
+        """Stop this window's monitors and config notifications before closing it."""
+        self.config.unsubscribe(self.on_config_changed)
+        for _, stop_event in list(self.monitoring_threads.values()):
+            stop_event.set()
+        self.ui.stop()
+        self.destroy()
+
     def stop_monitoring(self, url):
         """Stop monitoring a specific URL."""
         if url in self.monitoring_threads:
@@ -611,7 +1068,7 @@ class WebMonitorApp(ctk.CTk):
 
 def get_monitored_sites():
     """Get the list of monitored sites with their danger levels."""
-    return tasks_monitored_urls
+    return get_config().sites()
 
 def choose_output_directory():
     """Let the user choose where to save the monitoring folders."""
@@ -629,6 +1086,7 @@ def choose_output_directory():
 
 def run_WebMontoring():
     """Run the Web Monitoring application."""
+    setup_logging()
     root = ctk.CTk()
     root.title("Web Monitor")
     root.geometry("800x600")
@@ -692,9 +1150,8 @@ def run_WebMontoring():
     status_text.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
     
     def add_status(message):
-        """Add a status message to the text box."""
-        status_text.insert("end", f"{message}\n")
-        status_text.see("end")
+        """Add a status message to the text box, keeping only the latest lines."""
+        append_trimmed(status_text, [message])
     
     def start_monitoring():
         """Start monitoring the website."""
@@ -705,6 +1162,11 @@ def run_WebMontoring():
         if not url or not interval:
             messagebox.showerror("Erreur", "Veuillez remplir tous les champs")
             return
+        error = validate_url(url)
+        if error:
+            messagebox.showerror("Erreur", error)
+            return
+        url = normalize_url(url)
         
         try:
             interval = int(interval)
@@ -719,8 +1181,8 @@ def run_WebMontoring():
         if not output_dir:  # User cancelled
             return
         
-        # Add to monitored URLs
-        tasks_monitored_urls.append({
+        # Add to monitored URLs; open monitor windows start it from the change notification
+        get_config().upsert_site({
             "url": url,
             "interval": interval,
             "danger_level": danger_level,
@@ -744,14 +1206,12 @@ def run_WebMontoring():
             messagebox.showerror("Erreur", "Veuillez entrer l'URL à arrêter")
             return
         
-        # Find and remove from monitored URLs
-        for i, site in enumerate(tasks_monitored_urls):
-            if site["url"] == url:
-                tasks_monitored_urls.pop(i)
-                add_status(f"Surveillance arrêtée pour {url}")
-                break
-        else:
+        # Remove from monitored URLs; open monitor windows stop it from the change notification
+        if get_config().get(url) is None:
             messagebox.showerror("Erreur", "URL non trouvée dans les sites surveillés")
+            return
+        get_config().remove_site(url)
+        add_status(f"Surveillance arrêtée pour {url}")
     
     # Add buttons
     start_btn = ctk.CTkButton(button_frame, text="Démarrer", command=start_monitoring)
@@ -763,5 +1223,6 @@ def run_WebMontoring():
     root.mainloop()
 
 if __name__ == "__main__":
+    setup_logging()
     app = WebMonitorApp()
     app.mainloop()
\ No newline at end of file
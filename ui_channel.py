@@ -0,0 +1,102 @@
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Lines kept in on-screen activity logs
+UI_LOG_LINES = 200
+
+def get_ui_logger():
+    """Logger receiving every status message in full.
+
+    Records go through the queue set up by log_setup.setup_logging, to the
+    JSON log file only: status messages already show in the windows.
+    """
+    return logging.getLogger("webmonitor.ui")
+
+def append_trimmed(textbox, lines, max_lines=UI_LOG_LINES):
+    """Append lines to a textbox and drop the oldest ones beyond max_lines."""
+    if not lines:
+        return
+    textbox.insert("end", "".join(f"{line}\n" for line in lines))
+    excess = int(textbox.index("end-1c").split(".")[0]) - 1 - max_lines
+    if excess > 0:
+        textbox.delete("1.0", f"{excess + 1}.0")
+    textbox.see("end")
+
+class UIChannel:
+    """Thread-safe channel from worker threads to the Tk thread.
+
+    Workers post status messages and UI calls from any thread; the Tk
+    thread drains them every interval_ms. Status messages are coalesced
+    per key (usually the URL): only the latest one is kept, and a key is
+    shown at most once per min_key_interval seconds. Calls run in order,
+    at most max_calls per frame, so bursts (thousands of tags, many URLs)
+    cannot flood the Tk event queue. Every message also goes to the
+    JSON log file, uncoalesced.
+    """
+
+    def __init__(self, root, show, interval_ms=100, min_key_interval=1.0, max_calls=200):
+        self.root = root
+        self.show = show
+        self.interval_ms = interval_ms
+        self.min_key_interval = min_key_interval
+        self.max_calls = max_calls
+        self.lock = threading.Lock()
+        self.pending = OrderedDict()
+        self.calls = deque()
+        self.last_shown = {}
+        self.counter = 0
+        self.logger = get_ui_logger()
+        self.stopped = False
+        self.root.after(self.interval_ms, self._drain)
+
+    def post(self, message, key=None):
+        """Queue a status message; a newer message with the same key replaces it."""
+        self.logger.info(message, extra={"url": key} if key is not None else None)
+        with self.lock:
+            if key is None:
+                self.counter += 1
+                key = ("unkeyed", self.counter)
+            else:
+                key = ("key", key)
+            self.pending.pop(key, None)
+            self.pending[key] = message
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the Tk thread, in order with other calls."""
+        with self.lock:
+            self.calls.append((fn, args, kwargs))
+
+    def stop(self):
+        self.stopped = True
+
+    def _drain(self):
+        if self.stopped:
+            return
+        now = time.monotonic()
+        with self.lock:
+            calls = [self.calls.popleft() for _ in range(min(self.max_calls, len(self.calls)))]
+            ready = []
+            for key, message in list(self.pending.items()):
+                if key[0] == "unkeyed" or now - self.last_shown.get(key, 0) >= self.min_key_interval:
+                    ready.append(message)
+                    del self.pending[key]
+                    if key[0] == "key":
+                        self.last_shown[key] = now
+        for fn, args, kwargs in calls:
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Error in UI call {getattr(fn, '__name__', fn)}: {e}")
+        if ready:
+            try:
+                self.show(ready)
+            except Exception as e:
+                logger.error(f"Error showing status messages: {e}")
+        try:
+            self.root.after(self.interval_ms, self._drain)
+        except Exception:
+            self.stopped = True  # Window destroyed
@@ -0,0 +1,40 @@
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def validate_url(url):
+    """Return None if url can be monitored, otherwise the reason it cannot."""
+    if not url:
+        return "URL vide"
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError as e:
+        return f"URL invalide: {e}"
+    if parts.scheme.lower() not in DEFAULT_PORTS:
+        return "URL doit commencer par http:// ou https://"
+    if not parts.hostname:
+        return "Nom d'hôte manquant"
+    if port is not None and not 0 < port < 65536:
+        return f"Port invalide: {port}"
+    return None
+
+def normalize_url(url):
+    """Canonical form of url, so equivalent spellings map to the same site.
+
+    Lowercases the scheme and host, drops the default port and the fragment,
+    and gives an empty path a trailing slash: "HTTPS://X.com:443" and
+    "https://x.com/#top" both become "https://x.com/". The query string and
+    the case of the path are kept, since servers may treat them as distinct.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:  # IPv6 literal
+        host = f"[{host}]"
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        host = f"{userinfo}@{host}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
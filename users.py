@@ -0,0 +1,56 @@
+import os
+import hmac
+import hashlib
+
+from db import Database
+
+USERS_DB_PATH = os.path.join(os.getcwd(), "users.db")
+
+# username is UNIQUE, so SQLite keeps an index on it: logins are a single index lookup
+USERS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL CHECK(role IN ('admin', 'user'))
+    );
+'''
+
+# Accounts created when the table is empty
+DEFAULT_USERS = (("admin", "admin", "admin"), ("user", "user", "user"))
+
+USERS = Database(USERS_DB_PATH, USERS_SCHEMA)
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def ensure_default_users():
+    """Create the default accounts if there is no user yet."""
+    with USERS.transaction() as conn:
+        if conn.execute('SELECT 1 FROM users LIMIT 1').fetchone() is None:
+            conn.executemany('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
+                             [(name, hash_password(password), role) for name, password, role in DEFAULT_USERS])
+
+def authenticate(username, password):
+    """Return the user's role, or None if the username or the password is wrong."""
+    row = USERS.query_one('SELECT password, role FROM users WHERE username = ?', (username,))
+    if row is None or not hmac.compare_digest(row[0], hash_password(password)):
+        return None
+    return row[1]
+
+def add_user(username, password, role):
+    """Add a user; raises sqlite3.IntegrityError if the username is taken."""
+    USERS.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
+                  (username, hash_password(password), role))
+
+def list_users():
+    """Return [(username, role)] in creation order."""
+    return USERS.query_all('SELECT username, role FROM users ORDER BY id')
+
+def delete_user(username):
+    USERS.execute('DELETE FROM users WHERE username = ?', (username,))
+
+def reset_users():
+    """Delete the database and recreate it with the default accounts only."""
+    USERS.delete()
+    ensure_default_users()